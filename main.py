@@ -3,7 +3,28 @@ import sys
 
 
 if __name__ == "__main__":
+    # profile=<file.csv or file.jsonl> (anywhere in the arguments) writes the profile of every frame in the file
+    profile_path = next((arg.split("=", 1)[1] for arg in sys.argv[1:] if arg.startswith("profile=")), None)
+    # record=<file> records the input of the session in the file, to replay it with python main.py replay <file>
+    record_path = next((arg.split("=", 1)[1] for arg in sys.argv[1:] if arg.startswith("record=")), None)
+    # leaderboard=<url> uses another leaderboard server (e.g. a local one, for tests)
+    leaderboard_endpoint = next((arg.split("=", 1)[1] for arg in sys.argv[1:] if arg.startswith("leaderboard=")), None)
+    args = [arg for arg in sys.argv if not arg.startswith(("profile=", "record=", "leaderboard="))]
+
     special_args = None
-    if len(sys.argv) > 1:
-        special_args = sys.argv[1]
-    App().run(special_args)
+    if len(args) > 1:
+        special_args = args[1]
+    if special_args == "bench":
+        # python main.py bench [scenario ...] [frames=600] [seed=0] [history=bench_history.jsonl]
+        from src.benchmark import main
+        main(args[2:])
+    elif special_args == "replay":
+        # python main.py replay <file> [headless] [norender]
+        App(headless="headless" in args).replay(args[2], render="norender" not in args, profile_path=profile_path)
+    elif special_args == "headless":
+        # python main.py headless [number of frames] [norender]
+        App(headless=True).run_headless(int(args[2]) if len(args) > 2 else 1000,
+                                        render="norender" not in args, profile_path=profile_path)
+    else:
+        App(leaderboard_endpoint=leaderboard_endpoint).run(special_args, profile_path=profile_path,
+                                                           record_path=record_path)
@@ -1,10 +1,16 @@
+import os
+import random
 import pygame as pg
 
+from time import perf_counter
 from threading import Thread
 from .game import Game
-from .objects import vec
+from .objects import vec, game_clock, text_cache, assets
 from .settings import SettingsMenu
 from .leaderboard import LeaderBoard
+from .profiler import profiler
+from .replay import InputRecorder, Replayer, load_recording
+from .leaderboard_service import LeaderboardService, ScoreQueue, LeaderboardIndex
 
 import scoreunlocked
 
@@ -29,23 +35,14 @@ class LoadingThread(Thread):
             self.exception = e
 
 
-class PostingThread(Thread):
-
-    def __init__(self, app, name, score):
-        super(PostingThread, self).__init__()
-        self.client = app.client
-        self.client_name = name
-        self.score = score
-        self.app = app
-
-    def run(self) -> None:
-        self.client.connect("fks124", self.app.ldb_key)
-        self.client.post_score(name=self.client_name, score=self.score)
-        self.app.leader_board_menu.refresh()
-
-
 class App:
-    def __init__(self) -> None:
+    def __init__(self, headless: bool = False, leaderboard_endpoint: str | None = None) -> None:
+        # headless mode : no window, no audio output and no network (intended for benchmarks and CI)
+        self.headless = headless
+        if self.headless:
+            os.environ["SDL_VIDEODRIVER"] = "dummy"
+            os.environ["SDL_AUDIODRIVER"] = "dummy"
+
         if not pg.get_init():
             pg.mixer.pre_init()
             pg.init()
@@ -56,7 +53,10 @@ class App:
         self.window_size = 1200, 700
 
         self.vsync = True
-        if len(size := pg.display.get_desktop_sizes()) == 1:
+        if self.headless:
+            self.window_flags = 0
+            self.vsync = False
+        elif len(size := pg.display.get_desktop_sizes()) == 1:
             w, h = size[0]
             if w < self.window_size[0] or h < self.window_size[1]:
                 self.window_flags = pg.SCALED | pg.FULLSCREEN
@@ -75,6 +75,10 @@ class App:
 
         self.key_preset = "Arrow Keys"
         self.settings_menu = None
+
+        # input recording of the session (see src/replay.py), and True while a recorded session is played again
+        self.recorder: InputRecorder | None = None
+        self.replaying = False
         self.leader_board_menu = None
 
         # frame rate
@@ -82,48 +86,67 @@ class App:
         self.FPS = 60
         self.dt = 0
 
-        self.play_sound = True
-        self.play_music = True
-
-        try:
-            self.client = scoreunlocked.Client()
-        except:
-            self.client = None
+        # the game is simulated by fixed steps, at the rate the physics have been made for
+        self.TICK_RATE = 60
+        self.step_time = 1 / self.TICK_RATE
+        # longest time the simulation can catch up in one frame (e.g. after the settings or a freeze)
+        self.MAX_FRAME_TIME = 0.25
+
+        self.play_sound = not self.headless
+        self.play_music = not self.headless
+
+        # seconds a request to the leaderboard server can take before being given up
+        self.NETWORK_TIMEOUT = 3
+        # scores not uploaded yet (sent when the server can be reached, even in a later session)
+        self.PENDING_SCORES_PATH = "pending_scores.jsonl"
+
+        self.client = None
+        if not self.headless:
+            try:
+                # another endpoint can be given, e.g. a local server to test the leaderboard
+                self.client = scoreunlocked.Client(timeout=self.NETWORK_TIMEOUT) if leaderboard_endpoint is None \
+                    else scoreunlocked.Client(timeout=self.NETWORK_TIMEOUT, endpoint=leaderboard_endpoint)
+            except:
+                self.client = None
 
         self.ldb_key = 'cubes-hidden-dimensions'
         self.client_name = ''
-        self.leader_board = ''
 
-        self.connect("")
+        # the network is only used from the thread of the service, the leaderboard is loaded while the game loads
+        self.leaderboard_service: LeaderboardService | None = None
+        if self.client is not None:
+            self.leaderboard_service = LeaderboardService(self.client, 'fks124', self.ldb_key,
+                                                          ScoreQueue(self.PENDING_SCORES_PATH))
+            self.leaderboard_service.start()
+            self.leaderboard_service.refresh()
 
     @staticmethod
     def quit_():
+        profiler.stop_export()
         pg.quit()
         raise SystemExit
 
     def connect(self, user_name):
-        if self.client is not None:
-            self.client.connect('fks124', self.ldb_key)
-            self.leader_board = self.client.get_leaderboard()
-
         if self.client is not None and user_name != '':
             self.client_name = user_name
 
     def post_score(self, score: int):
         if self.client is not None and self.client_name != "":
-            PostingThread(self, self.client_name, score).start()
+            self.leaderboard_service.post_score(self.client_name, score)
 
     def get_leaderboard(self):
+        # asks for the leaderboard again, leader_board is updated when it has been received
         if self.client is not None:
-            self.leader_board = sorted(ldb, key=lambda x: -x[1]) \
-                if isinstance(ldb := self.client.get_leaderboard(), list) else None
+            self.leaderboard_service.refresh()
+
+    @property
+    def leader_board(self) -> LeaderboardIndex | None:
+        # last leaderboard received, None if none could be loaded yet
+        return self.leaderboard_service.leader_board if self.leaderboard_service is not None else None
 
     def get_rank(self, user_name) -> int:
         ldb = self.leader_board
-        for idx, rank in enumerate(ldb):
-            if rank[0] == user_name:
-                return idx
-        return -1
+        return ldb.get_rank(user_name) if ldb is not None else -1
 
     def preset_wasd(self):
         self.key_preset = "WASD"
@@ -144,11 +167,11 @@ class App:
         thread = LoadingThread(self)
         thread.start()
 
-        title_font = pg.font.Font("assets/fonts/RedPixel.otf", 150)
+        title_font = assets.font("assets/fonts/RedPixel.otf", 150)
         title = title_font.render("Cubic Engine", True, (0, 255, 0))
         title_rect = title.get_rect(center=(self.screen.get_width()//2, self.screen.get_height()//3))
 
-        font = pg.font.Font("assets/fonts/Consolas.ttf", 25)
+        font = assets.font("assets/fonts/Consolas.ttf", 25)
         rect = pg.Rect(0, 0, self.screen.get_width() * 2 / 3, 50)
         rect.center = self.screen.get_width() // 2, self.screen.get_height() // 2
         last_sum = 0
@@ -183,7 +206,7 @@ class App:
                 if thread.exception is not None and not item:
                     output = f"{key}: ERROR -> {thread.exception}"
                     color = (255, 0, 0)
-                rendered = font.render(output, True, color)
+                rendered = text_cache.render(font, output, color)
                 rect2 = rendered.get_rect(topleft=(vec(rect.bottomleft)+pg.Vector2(2, 50 + dy)))
                 self.screen.blit(rendered, rect2)
                 if not item:
@@ -194,28 +217,167 @@ class App:
             self.clock.tick(self.FPS)
 
     def settings(self):
+        if self.replaying:
+            return
         self.settings_menu.run(self.screen.copy())
 
-    def run(self, special_arg=None):
+    def seed(self, seed: int):
+        # the simulation only uses the random module (the backgrounds, made while loading) and the generator of the map
+        random.seed(seed)
+        game_clock.reset()
+
+    def run(self, special_arg=None, profile_path: str | None = None, record_path: str | None = None):
+        # profile_path : file where the profiler writes every frame (see FrameProfiler)
+        # record_path : file where the input of the session is recorded (see InputRecorder)
+        if profile_path is not None:
+            profiler.start_export(profile_path)
+        if record_path is not None:
+            self.recorder = InputRecorder(record_path, random.randrange(2 ** 32), self.TICK_RATE)
+            self.seed(self.recorder.seed)
         self.loading_screen()
+        if self.recorder is not None:
+            self.game.map.seed(self.recorder.seed)
 
         if special_arg in self.special_args:
             self.special_args[special_arg]()
             self.game.init_ui_menu()
 
-        self.game.objects[0].do_binding()
+        self.game.player.do_binding()
         self.settings_menu = SettingsMenu(self)
         self.leader_board_menu = LeaderBoard(self)
 
-        while self.running:
-
-            for event in pg.event.get():
-                if event.type == pg.QUIT:
-                    print(self.get_leaderboard())
-                    self.quit_()
-
-                self.game.handle_events(event)
-
-            self.game.routine()
-            pg.display.update()
-            self.dt = self.clock.tick(self.FPS) / 1000
+        # the simulation runs by fixed steps, as many as needed to catch up with the time spent since the last frame,
+        # and the frame is drawn in between the last two steps with what is left of that time
+        accumulator = 0
+        profiler.reset()
+        try:
+            while self.running:
+
+                for event in pg.event.get():
+                    if event.type == pg.QUIT:
+                        self.quit_()
+
+                    if self.recorder is not None:
+                        self.recorder.record_event(event)
+                    self.game.handle_events(event)
+                    profiler.handle_events(event)
+
+                accumulator += min(self.dt, self.MAX_FRAME_TIME)
+                n_steps = 0
+                while accumulator >= self.step_time:
+                    if self.recorder is not None:
+                        self.recorder.record_step(self)
+                    self.game.step()
+                    accumulator -= self.step_time
+                    n_steps += 1
+
+                self.game.render(accumulator / self.step_time)
+                if self.recorder is not None:
+                    self.recorder.record_frame(n_steps, accumulator / self.step_time)
+                profiler.draw(self.screen)
+                with profiler.phase("display"):
+                    pg.display.update()
+                self.dt = self.clock.tick(self.FPS) / 1000
+                profiler.end_frame()
+        finally:
+            # saved however the session ends (quit, crash...)
+            if self.recorder is not None:
+                self.recorder.save()
+
+    def replay(self, path: str, render: bool = True, profile_path: str | None = None):
+        # plays a recorded session again (see Replayer), as fast as possible in headless mode
+        recording = load_recording(path)
+        if profile_path is not None:
+            profiler.start_export(profile_path)
+        self.replaying = True
+        # nothing is posted from a replay
+        self.client = None
+        self.TICK_RATE = recording["tick_rate"]
+        self.step_time = 1 / self.TICK_RATE
+        self.seed(recording["seed"])
+        if self.headless:
+            thread = LoadingThread(self)
+            thread.run()
+            if thread.exception is not None:
+                raise thread.exception
+        else:
+            self.loading_screen()
+        self.game.map.seed(recording["seed"])
+
+        replayer = Replayer(self, recording)
+        replayer.apply_first_settings()
+        self.game.init_ui_menu()
+        self.game.player.do_binding()
+        self.settings_menu = SettingsMenu(self)
+        self.leader_board_menu = LeaderBoard(self)
+        try:
+            replayer.run(render)
+        finally:
+            profiler.stop_export()
+            self.replaying = False
+
+    def headless_input(self, blocked_frames: int) -> int:
+        # scripted input : run to the right while jumping, dash into what blocks the way, and if it's still blocked
+        # after one second, skip a few tiles (the point is to keep generating the map, not to play well)
+        player = self.game.player
+        if player.dead:
+            self.game.go_back_to_menu()
+            self.game.start_game()
+            return 0
+
+        player.move("right")
+        player.jump()
+        if not player.static_x:
+            return 0
+        player.dash()
+        if blocked_frames > self.FPS:
+            player.rect.topleft = (player.rect.x + 3 * self.game.map.tile_size.x, 0)
+            player.gravity = 0
+            return 0
+        return blocked_frames + 1
+
+    def run_headless(self, n_frames: int, render: bool = True, profile_path: str | None = None) -> dict[str, float]:
+        # loads the game without the loading screen, starts a run and runs Game.routine as fast as possible
+        # (or only the steps of the simulation, if render is False)
+        if profile_path is not None:
+            profiler.start_export(profile_path)
+        thread = LoadingThread(self)
+        thread.run()
+        if thread.exception is not None:
+            raise thread.exception
+
+        self.game.player.do_binding()
+        self.game.start_game()
+
+        frame_times = []
+        blocked_frames = 0
+        profiler.reset()
+        begin = perf_counter()
+        for _ in range(n_frames):
+            pg.event.get()
+            blocked_frames = self.headless_input(blocked_frames)
+
+            frame_begin = perf_counter()
+            if render:
+                self.game.routine()
+            else:
+                self.game.step()
+            frame_times.append(perf_counter() - frame_begin)
+            profiler.end_frame()
+        total = perf_counter() - begin
+        profiler.stop_export()
+
+        frame_times.sort()
+        report = {
+            "frames": n_frames,
+            "total_s": total,
+            "fps": n_frames / total,
+            "mean_ms": sum(frame_times) / n_frames * 1000,
+            "median_ms": frame_times[n_frames // 2] * 1000,
+            "p95_ms": frame_times[min(n_frames - 1, int(n_frames * 0.95))] * 1000,
+            "max_ms": frame_times[-1] * 1000
+        }
+        print(f"{report['frames']} frames in {report['total_s']:.2f}s -> {report['fps']:.1f} FPS")
+        print(f"frame time (ms) : mean {report['mean_ms']:.2f} | median {report['median_ms']:.2f} | "
+              f"p95 {report['p95_ms']:.2f} | max {report['max_ms']:.2f}")
+        return report
@@ -0,0 +1,212 @@
+"""
+Benchmarks of the game loop : Game.routine run headless through fixed scenarios.
+
+python main.py bench [scenario ...] [frames=600] [seed=0] [history=bench_history.jsonl]
+
+Each scenario starts from a new game made with the same seed : the clouds and stars of the backgrounds and the sequence
+of presets chosen by the map are the same from one run to the other, so that the results of two commits can be
+compared. The frame times (mean, median, p95, p99, max) and the mean time of each phase of the profiler are printed,
+and added to the history file (one JSON object per line) with the commit they have been measured on.
+"""
+
+import json
+import platform
+import random
+import subprocess
+from datetime import datetime
+from math import ceil
+from time import perf_counter
+from typing import Callable
+
+import pygame as pg
+
+from .app import App, LoadingThread
+from .game import Game
+from .objects import game_clock, assets
+from .profiler import profiler
+
+
+def new_app(seed: int) -> App:
+    random.seed(seed)
+    game_clock.reset()
+    app = App(headless=True)
+    thread = LoadingThread(app)
+    thread.run()
+    if thread.exception is not None:
+        raise thread.exception
+    app.game.map.seed(seed)
+    app.game.player.do_binding()
+    # a death would send the player back to the menu (and out of the scenario), so the player is moved further instead
+    app.game.kill_player = lambda: respawn(app.game)
+    return app
+
+
+def respawn(game: Game):
+    game.player.rect.topleft = (game.player.rect.x + 3 * game.map.tile_size.x, 200)
+    game.player.gravity = 0
+
+
+def get_chunk_width(game: Game) -> float:
+    return game.map.chunk_size.x * game.map.tile_size.x
+
+
+def reach(game: Game, environment: str):
+    # starts a run and moves the player forward chunk by chunk until it is in the environment, which is then kept
+    # until the end of the scenario (no more transitions)
+    game.start_game()
+    for _ in range(100):
+        if game.map.get_environment(game.player) == environment:
+            break
+        chunk = game.map.get_current_chunk(pg.Vector2(game.player.rect.topleft))
+        game.player.rect.topleft = ((chunk[0] + 1) * get_chunk_width(game) + game.map.tile_size.x, 200)
+        game.player.gravity = 0
+        game.step()
+    else:
+        raise RuntimeError(f"the environment {environment} hasn't been reached")
+    game.map.n_chunk_before_switch = float("inf")
+
+
+def run_right(app: App, frame: int, n_frames: int, state: dict):
+    state["blocked"] = app.headless_input(state.get("blocked", 0))
+
+
+def run_far(app: App, frame: int, n_frames: int, state: dict):
+    # runs, and skips a chunk regularly, so that about 60 chunks are generated whatever the number of frames
+    run_right(app, frame, n_frames, state)
+    if frame % max(1, n_frames // 60) == 0:
+        game = app.game
+        game.player.rect.topleft = (game.player.rect.x + get_chunk_width(game), 200)
+        game.player.gravity = 0
+
+
+def run_in_transition(app: App, frame: int, n_frames: int, state: dict):
+    # runs, and goes back to the start of the transition chunk (camera included) each time the player leaves it, so
+    # that the whole scenario is measured in the transition whatever the number of frames
+    game = app.game
+    if frame == 0:
+        state["environment"] = game.map.get_environment(game.player)
+        state["start"] = game.player.rect.topleft
+    elif game.map.get_environment(game.player) != state["environment"]:
+        game.scroll.x += game.player.rect.x - state["start"][0]
+        game.player.rect.topleft = state["start"]
+        game.player.gravity = 0
+    run_right(app, frame, n_frames, state)
+
+
+def stand(app: App, frame: int, n_frames: int, state: dict):
+    pass
+
+
+# name -> (setup of the game, input of each frame)
+SCENARIOS: dict[str, tuple[Callable[[Game], None], Callable[[App, int, int, dict], None]]] = {
+    "menu": (lambda game: None, stand),
+    "normal": (lambda game: game.start_game(), run_right),
+    "moon": (lambda game: reach(game, "moon"), run_right),
+    "neon": (lambda game: reach(game, "neon"), run_right),
+    "transition_to_moon": (lambda game: reach(game, "transition_to_moon"), run_in_transition),
+    "transition_to_neon": (lambda game: reach(game, "transition_to_neon"), run_in_transition),
+    "transition_to_normal": (lambda game: reach(game, "transition_to_normal"), run_in_transition),
+    "long_run": (lambda game: game.start_game(), run_far)
+}
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, max(0, ceil(p * len(sorted_values)) - 1))]
+
+
+def run_scenario(name: str, n_frames: int, seed: int) -> dict[str, float | int | dict[str, float]]:
+    setup, frame_input = SCENARIOS[name]
+    app = new_app(seed)
+    setup(app.game)
+
+    frame_times = []
+    frames = []
+    state = {}
+    profiler.reset()
+    for frame in range(n_frames):
+        pg.event.get()
+        frame_input(app, frame, n_frames, state)
+
+        frame_begin = perf_counter()
+        app.game.routine()
+        frame_times.append(perf_counter() - frame_begin)
+        profiler.end_frame()
+        frames.append(profiler.frames[-1])
+
+    frame_times = sorted(time * 1000 for time in frame_times)
+    return {
+        "frames": n_frames,
+        "mean_ms": sum(frame_times) / n_frames,
+        "median_ms": percentile(frame_times, 0.5),
+        "p95_ms": percentile(frame_times, 0.95),
+        "p99_ms": percentile(frame_times, 0.99),
+        "max_ms": frame_times[-1],
+        "chunks_generated": sum(frame["chunks_generated"] for frame in frames),
+        "phases_ms": {phase: sum(frame[f"{phase}_ms"] for frame in frames) / n_frames
+                      for phase in profiler.PHASES if phase != "display"}
+    }
+
+
+def get_commit() -> str | None:
+    try:
+        output = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return output.stdout.strip() or None
+
+
+def load_history(path: str) -> list[dict]:
+    try:
+        with open(path) as file:
+            return [json.loads(line) for line in file if line.strip()]
+    except FileNotFoundError:
+        return []
+
+
+def print_results(results: dict[str, dict], previous: dict | None):
+    print(f"{'scenario':<22}{'mean':>8}{'median':>8}{'p95':>8}{'p99':>8}{'max':>8}  (ms)"
+          + ("   mean / p95 vs " + str(previous["commit"]) if previous is not None else ""))
+    for name, result in results.items():
+        line = f"{name:<22}" + "".join(f"{result[key]:8.2f}" for key in
+                                       ("mean_ms", "median_ms", "p95_ms", "p99_ms", "max_ms"))
+        if previous is not None and name in previous["scenarios"]:
+            old = previous["scenarios"][name]
+            line += f"   {(result['mean_ms'] / old['mean_ms'] - 1) * 100:+6.1f}% / " \
+                    f"{(result['p95_ms'] / old['p95_ms'] - 1) * 100:+6.1f}%"
+        print(line)
+        print(" " * 22 + "  ".join(f"{phase} {time:.2f}" for phase, time in result["phases_ms"].items()
+                                   if time >= 0.01))
+
+
+def main(args: list[str]) -> dict:
+    options = dict(arg.split("=", 1) for arg in args if "=" in arg)
+    names = [arg for arg in args if "=" not in arg] or list(SCENARIOS)
+    for name in names:
+        if name not in SCENARIOS:
+            raise SystemExit(f"unknown scenario {name} (scenarios : {', '.join(SCENARIOS)})")
+    n_frames = int(options.get("frames", 600))
+    seed = int(options.get("seed", 0))
+    history_path = options.get("history", "bench_history.jsonl")
+
+    results = {}
+    for name in names:
+        results[name] = run_scenario(name, n_frames, seed)
+
+    entry = {
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "commit": get_commit(),
+        "seed": seed,
+        "frames": n_frames,
+        "python": platform.python_version(),
+        "pygame": pg.version.ver,
+        "assets_bytes": assets.get_memory_usage(),
+        "scenarios": results
+    }
+    # compared to the last entry measured in the same conditions
+    previous = next((old for old in reversed(load_history(history_path))
+                     if old["seed"] == seed and old["frames"] == n_frames), None)
+    print_results(results, previous)
+    print("assets : " + "  ".join(f"{kind} {size / 1024:.0f} KiB" for kind, size in entry["assets_bytes"].items()))
+    with open(history_path, "a") as file:
+        file.write(json.dumps(entry) + "\n")
+    return entry
@@ -0,0 +1,114 @@
+import pygame as pg
+from pygame.gfxdraw import filled_polygon, aapolygon
+from .objects import Object2d, vec
+from .map import TileSprite
+
+
+class ChunkSurfaceCache:
+
+    """
+    Fronts of the static tiles of each chunk, drawn once into one surface per chunk.
+
+    The tiles never move, so instead of drawing every tile of the screen each frame, Game.render only blits the
+    surface of each chunk around the player. The neon environment draws every object as a neon polygon, so each chunk
+    has two surfaces, one for the neon environment and one for the others (made the first time they are needed).
+    The beacons change their surface when they are pressed, so they stay out of the cache and are drawn every frame,
+    like the objects that are not tiles.
+    The perspective faces depend on the camera, so they are still drawn every frame (see Game.draw_perspective), only
+    their colors are kept here.
+    The chunks are prepared when they're generated, before they can be seen, and baked one per frame (bake_next), so
+    that drawing a chunk for the first time doesn't cost the frame that shows it.
+    """
+
+    def __init__(self):
+        # (chunk, neon environment) -> (surface, position of its top left corner in the world)
+        self.surfaces: dict[tuple[tuple[int, int] | str, bool], tuple[pg.Surface, vec]] = {}
+        self.face_colors: dict[TileSprite, dict[str, pg.Color]] = {}
+        # chunks to bake before they're needed, with their objects (in the order they have been prepared)
+        self.pending: dict[tuple[tuple[int, int] | str, bool], dict] = {}
+        # outline of a neon tile -> white surface with the coverage of the antialiased outline as alpha
+        self.outlines: dict[tuple[bool, int, int], pg.Surface] = {}
+
+    @staticmethod
+    def is_static_tile(obj: Object2d) -> bool:
+        return isinstance(obj, TileSprite) and obj.tag != "beacon"
+
+    def bake(self, tiles: list[TileSprite], neon: bool) -> tuple[pg.Surface, vec]:
+        if not tiles:
+            return pg.Surface((0, 0)), vec(0, 0)
+        bounds = tiles[0].rect.unionall([tile.rect for tile in tiles[1:]])
+        offset = -vec(bounds.topleft)
+        # the neon polygons go one pixel further than the rects (up to their right and bottom edges)
+        size = bounds.w + 1, bounds.h + 1
+        surface = pg.Surface(size, pg.SRCALPHA)
+        outlines = []
+        for tile in tiles:
+            # same drawing as the one of Game.render for the objects
+            if tile.tag == "neon" or neon:
+                rect = tile.rect.move(offset)
+                filled_polygon(surface, self.get_polygon(tile.tag == "spike", rect), (0, 0, 0))
+                outlines.append((self.get_outline(tile.tag == "spike", rect.w, rect.h), rect.topleft))
+            else:
+                tile.draw(surface, offset)
+        # drawn over all the tiles, as Game.render used to draw the outlines after the filled polygons
+        surface.blits(outlines, False)
+        # most of the surface is transparent (in between the tiles), the run-length encoding skips it when blitting
+        surface.set_alpha(255, pg.RLEACCEL)
+        return surface, vec(bounds.topleft)
+
+    @staticmethod
+    def get_polygon(spike: bool, rect: pg.Rect) -> list:
+        if not spike:
+            return [rect.topleft, rect.topright, rect.bottomright, rect.bottomleft]
+        return [rect.bottomleft, rect.bottomright, (rect.x + rect.w / 2, rect.y + rect.h * 0.13)]
+
+    def get_outline(self, spike: bool, w: int, h: int) -> pg.Surface:
+        # the antialiasing of the outlines blends them with what is under them, which isn't known yet, so they are
+        # drawn in white with the coverage of each pixel as its alpha, to be blended when the chunk is drawn
+        if (outline := self.outlines.get((spike, w, h))) is None:
+            # (one more pixel on each side for the antialiasing of the slanted edges)
+            coverage = pg.Surface((w + 2, h + 2), 0, 32)
+            aapolygon(coverage, self.get_polygon(spike, pg.Rect(0, 0, w, h)), (255, 255, 255))
+            outline = self.outlines[(spike, w, h)] = pg.Surface(coverage.get_size(), pg.SRCALPHA)
+            outline.fill((255, 255, 255, 0))
+            alpha = pg.surfarray.pixels_alpha(outline)
+            alpha[:] = pg.surfarray.pixels_red(coverage)
+            del alpha
+        return outline
+
+    def prepare(self, chunk: tuple[int, int] | str, objects: dict, neon: bool):
+        # the chunk (just generated, or made again after being unloaded) will be baked by bake_next, unless it is
+        # needed before : a surface left from its previous objects is stale
+        self.invalidate(chunk)
+        self.pending[(chunk, neon)] = objects
+
+    def bake_next(self):
+        if self.pending:
+            chunk, neon = next(iter(self.pending))
+            self.get(chunk, self.pending[(chunk, neon)], neon)
+
+    def get(self, chunk: tuple[int, int] | str, objects, neon: bool) -> tuple[pg.Surface, vec]:
+        if (chunk, neon) not in self.surfaces:
+            self.pending.pop((chunk, neon), None)
+            self.surfaces[(chunk, neon)] = self.bake([obj for obj in objects if self.is_static_tile(obj)], neon)
+        return self.surfaces[(chunk, neon)]
+
+    def get_face_colors(self, tile: TileSprite) -> dict[str, pg.Color]:
+        if tile not in self.face_colors:
+            self.face_colors[tile] = {direction: tile.get_color(direction)
+                                      for direction in ('left', 'right', 'top', 'bottom')}
+        return self.face_colors[tile]
+
+    def invalidate(self, chunk: tuple[int, int] | str, removed_tiles=()):
+        # called when tiles of the chunk have been removed, or when it is unloaded (the chunk will be drawn again the
+        # next time it is needed)
+        for neon in (False, True):
+            self.surfaces.pop((chunk, neon), None)
+            self.pending.pop((chunk, neon), None)
+        for tile in removed_tiles:
+            self.face_colors.pop(tile, None)
+
+    def clear(self):
+        self.surfaces = {}
+        self.face_colors = {}
+        self.pending = {}
@@ -0,0 +1,90 @@
+import pygame as pg
+from .objects import StaticObject, vec
+from .profiler import profiler
+
+
+def get_collision_rect(collider: StaticObject) -> pg.Rect:
+    # the custom collider (if set) replaces the rect of the object in the collision algorithm
+    if collider.custom_collider != [0, 0, 0, 0]:
+        return pg.Rect(collider.rect.x + collider.custom_collider[0], collider.rect.y + collider.custom_collider[1],
+                       collider.custom_collider[2], collider.custom_collider[3])
+    return collider.rect.copy()
+
+
+class CollisionGrid:
+
+    """
+    Registry of the colliders and of their collision rects, bucketed on the tile grid of the map.
+
+    Chunks are always a whole number of tiles, so the cells of this grid are the cells of Map.chunks, only
+    indexed globally (x // tile_w, y // tile_h) instead of (chunk, row, col), which keeps the menu chunk
+    (that doesn't have the same chunk size) and the chunk borders out of the way.
+    A collider is registered in every cell its collision rect touches, so a query only looks at the cells
+    around the moving object, whatever the number of colliders added since the beginning of the run.
+    The collision rect is computed once when the collider is added, and only computed again when the collider
+    tells the registry it changed (see StaticObject.set_custom_collider and StaticObject.set_position).
+    """
+
+    def __init__(self, tile_size: vec):
+        self.tile_w, self.tile_h = int(tile_size.x), int(tile_size.y)
+        self.cells: dict[tuple[int, int], list[StaticObject]] = {}
+        # collider -> (insertion order, collision rect, cells it is registered in)
+        self.entries: dict[StaticObject, tuple[int, pg.Rect, list[tuple[int, int]]]] = {}
+        self.n_added = 0
+
+    def get_cells(self, rect: pg.Rect) -> list[tuple[int, int]]:
+        # the edges are included, so that colliders touching the rect are found as well
+        return [(x, y) for x in range(rect.left // self.tile_w, rect.right // self.tile_w + 1)
+                for y in range(rect.top // self.tile_h, rect.bottom // self.tile_h + 1)]
+
+    def register(self, collider: StaticObject, order: int):
+        rect = get_collision_rect(collider)
+        cells = self.get_cells(rect)
+        for cell in cells:
+            self.cells.setdefault(cell, []).append(collider)
+        self.entries[collider] = order, rect, cells
+
+    def unregister(self, collider: StaticObject) -> int:
+        order, rect, cells = self.entries.pop(collider)
+        for cell in cells:
+            self.cells[cell].remove(collider)
+            if not self.cells[cell]:
+                del self.cells[cell]
+        return order
+
+    def add(self, collider: StaticObject):
+        if collider in self.entries:
+            return
+        self.register(collider, self.n_added)
+        self.n_added += 1
+        collider.collider_registry = self
+
+    def update(self, collider: StaticObject):
+        # called by the collider itself when it has moved or when its custom collider changed
+        if collider not in self.entries or self.entries[collider][1] == get_collision_rect(collider):
+            return
+        self.register(collider, self.unregister(collider))
+
+    def remove(self, collider: StaticObject):
+        if collider not in self.entries:
+            return
+        self.unregister(collider)
+        collider.collider_registry = None
+
+    def clear(self):
+        for collider in self.entries:
+            collider.collider_registry = None
+        self.cells = {}
+        self.entries = {}
+        self.n_added = 0
+
+    def query(self, rect: pg.Rect) -> list[tuple[pg.Rect, StaticObject]]:
+        # returns the colliders around the rect, in the order they have been added (the collision algorithm
+        # keeps the first collider matching, so the order has to be the same as the one of the collider list)
+        found = set()
+        for cell in self.get_cells(rect):
+            if cell in self.cells:
+                found.update(self.cells[cell])
+        entries = sorted((self.entries[collider] + (collider,) for collider in found), key=lambda entry: entry[0])
+        profiler.count("colliders_scanned", len(entries))
+        return [(entry[1], entry[3]) for entry in entries]
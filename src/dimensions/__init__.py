@@ -1,3 +1,4 @@
 from .normal_dimension import NormalDimension
 from .moon_dimension import MoonDimension
 from .neon_dimension import NeonDimension
+from .tiles import Tile, tile_array
@@ -1,13 +1,14 @@
 from dataclasses import dataclass
+from .tiles import Tile
 
 
 @dataclass
 class MoonDimension:
-    S = "moon_sand"
-    s = "moon_spike"
-    n = "neon_block"
-    c = 13
-    m = "monster"
+    S = Tile.MOON_SAND
+    s = Tile.MOON_SPIKE
+    n = Tile.NEON_BLOCK
+    c = Tile.CANON
+    m = Tile.MONSTER
 
     following = {
         None: ["empty_preset"],
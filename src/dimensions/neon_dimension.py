@@ -1,13 +1,14 @@
 from dataclasses import dataclass
+from .tiles import Tile
 
 
 @dataclass
 class NeonDimension:
-    n = "neon_block"
-    g = 10
-    s = "neon_spike"
-    m = "monster"
-    c = 13
+    n = Tile.NEON_BLOCK
+    g = Tile.GRASS
+    s = Tile.NEON_SPIKE
+    m = Tile.MONSTER
+    c = Tile.CANON
 
     following = {
         None: ["empty_preset"],
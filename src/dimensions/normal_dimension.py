@@ -1,15 +1,16 @@
 from dataclasses import dataclass
+from .tiles import Tile
 
 
 @dataclass
 class NormalDimension:
-    g = 10
-    s = 11
-    b = 12
-    p = 4
-    c = 13
-    S = "moon_sand"
-    m = "monster"
+    g = Tile.GRASS
+    s = Tile.STONE
+    b = Tile.BEACON
+    p = Tile.SPIKE
+    c = Tile.CANON
+    S = Tile.MOON_SAND
+    m = Tile.MONSTER
 
     following = {
         None: ["empty_preset"],
@@ -0,0 +1,32 @@
+from enum import IntEnum
+import numpy as np
+
+
+class Tile(IntEnum):
+
+    """
+    Id of the content of each cell of the tile matrices (the presets of the dimensions and Map.chunks).
+
+    The ids fit in one byte, so a chunk is a 2D array of uint8 (see tile_array).
+    """
+
+    EMPTY = 0
+    COLOR = 3
+    SPIKE = 4
+    GRASS = 10
+    STONE = 11
+    BEACON = 12
+    CANON = 13
+    MONSTER = 14
+    MOON_SAND = 15
+    MOON_SPIKE = 16
+    NEON_BLOCK = 17
+    NEON_SPIKE = 18
+
+
+def tile_array(matrix: list[list[int]]) -> np.ndarray:
+    # read-only, so that the chunks can share the array of their preset until one of their tiles dies
+    # (the chunk then works on its own copy, see Map.remove_tile)
+    array = np.array(matrix, dtype=np.uint8)
+    array.flags.writeable = False
+    return array
@@ -1,4 +1,5 @@
 import pygame as pg
+from math import ceil, floor
 from typing import Callable
 from copy import copy
 from pygame.gfxdraw import filled_polygon, aapolygon
@@ -18,10 +19,18 @@ from .objects import (
     obj_type,
     Title,
     Particle,
-    Monster
+    Monster,
+    game_clock,
+    assets
 )
 from .background import Background, NormalBackground, MoonBackground
 from .map import Map, TileSprite
+from .collision import CollisionGrid
+from .registry import ObjectRegistry
+from .chunk_cache import ChunkSurfaceCache
+from .perspective import get_box_faces, get_spike_faces
+from .profiler import profiler
+from .music import MusicController
 
 
 def reversed_dir(direction: str | None):
@@ -35,11 +44,13 @@ def reversed_dir(direction: str | None):
 
 def polygon(display: pg.Surface, color, points: list[vec, ...] | tuple[vec, ...]):
     filled_polygon(display, points, color)
+    profiler.count("polygons")
 
 
 def neon_polygon(display: pg.Surface, color, points: list[vec, ...] | tuple[vec, ...]):
     filled_polygon(display, points, (0, 0, 0))
     aapolygon(display, points, (255, 255, 255))
+    profiler.count("polygons")
 
 
 def load(path: str):
@@ -71,7 +82,7 @@ def change(color: tuple[int, ...] | pg.Color, degree: float) -> pg.Color:
 class Game:
 
     # the collision tolerance is a multiplier that permits to predict collisions way before they happen
-    # WARNING : may cause problems with really high velocities
+    # (above one tile per step, the collision algorithm switches to sub-steps to stay correct)
 
     def __init__(self, app, loading_thread):
         # DISPLAY --------------------------
@@ -80,24 +91,25 @@ class Game:
         loading_thread.loaded["Display"] = True
 
         # OBJECTS --------------------------
-        self.objects: list[Object2d | Player] = [Player(app, (0, 0))]
-        self.monsters: list[Monster] = []
-        self.player = self.objects[0]
-        self.player_death_sound = pg.mixer.Sound("assets/sounds/SON_DEATH.mp3")
+        self.objects = ObjectRegistry()
+        self.player = Player(app, (0, 0))
+        self.objects.add(self.player)
+        self.player_death_sound = assets.sound("assets/sounds/SON_DEATH.mp3")
         self.player_death_sound.set_volume(0.5)
         self.drawing_objects = [self.player]
         loading_thread.loaded["Objects"] = True
 
-        # COLLISION ------------------------
-        self.collider_objects: list[StaticObject] = []
-        self.collision_rects: list[pg.Rect] = []
-
         # MAP ------------------------------
         self.map = Map(app)
+        self.collision_grid = CollisionGrid(self.map.tile_size)
+        self.chunk_cache = ChunkSurfaceCache()
+        # chunks drawn this frame (their tiles are drawn through the chunk cache)
+        self.drawing_chunks: list[tuple[int, int] | str] = []
+        # environment and transition of the player for the frame being drawn (see render)
+        self.environment = "normal"
+        self.transition: tuple[str, float] = ("none", 0.0)
         self.player.rect.topleft = (-25, 300)
-        menu_objects = self.map.generate_menu()
-        for menu_object in menu_objects:
-            self.add_object(menu_object)
+        self.add_chunk("menu", self.map.generate_menu())
         self.game_mode = "menu"  # "destruct", "menu"
         loading_thread.loaded["Map"] = True
 
@@ -108,13 +120,15 @@ class Game:
         self.score = 0
         self.last_frame_score = 0
         self.not_moving_frames = 0
-        score_font = pg.font.Font("assets/fonts/DISTROB_.ttf", 40)
-        warning_font = pg.font.Font("assets/fonts/DISTRO__.ttf", 30)
+        score_font = assets.font("assets/fonts/DISTROB_.ttf", 40)
+        warning_font = assets.font("assets/fonts/DISTRO__.ttf", 30)
         self.score_text = Text((self.screen.get_width() // 2, 50), score_font, "Score : 0", pg.Color(255, 255, 255),
                                shadow_=(2, 2), centered=True)
 
         # CAMERA ---------------------------
         self.scroll = vec(0, 0)
+        self.last_scroll = vec(0, 0)
+        self.last_positions: dict[DynamicObject, tuple[int, int]] = {}
         self.camera_free = False
         self.camera_limits: pg.Rect | None = None
         self.camera_fixed = False
@@ -147,8 +161,11 @@ class Game:
             'Haendel_Sarabande.mp3',
             'Prokofiev_Dance_Knights.mp3'
         ]
-        pg.mixer.music.load('assets/music/'+self.musics[0])
-        pg.mixer.music.play()
+        # the lead-in of the music of the menu is kept decoded, it comes back after every run
+        self.music = MusicController('assets/music/', pinned=(self.musics[0],))
+        if self.app.play_music:
+            self.music.play(self.musics[0], fade_ms=0)
+            self.music.prefetch(self.musics[1])
         self.music_index = 1
         loading_thread.loaded["Background"] = True
 
@@ -167,8 +184,8 @@ class Game:
             "Quit": self._quit
         }
 
-        title_font = pg.font.Font("assets/fonts/DISTROB_.ttf", 50)
-        subtitle_font = pg.font.Font("assets/fonts/DISTRO__.ttf", 30)
+        title_font = assets.font("assets/fonts/DISTROB_.ttf", 50)
+        subtitle_font = assets.font("assets/fonts/DISTRO__.ttf", 30)
         self.transition_texts: dict[str, list[UiObject]] = {
             "transition_to_moon": [
                 Text((self.screen.get_width() // 2, self.screen.get_height() // 4), title_font,
@@ -195,6 +212,8 @@ class Game:
                      centered=True)
             ]
         }
+        # fonts of the death screen, loaded now rather than when the player dies
+        assets.preload(fonts=[("assets/fonts/DISTROB_.ttf", 25), ("assets/fonts/DISTROB_.ttf", 80)])
 
         loading_thread.loaded["UI"] = True
 
@@ -206,39 +225,44 @@ class Game:
         self.map.quit_menu()
         self.map.init_game()
         self.music_index = 1
-        pg.mixer.music.load('assets/music/'+self.musics[self.music_index])
-        pg.mixer.music.play()
+        if self.app.play_music:
+            self.music.play(self.musics[self.music_index])
+            self.music.prefetch(self.musics[self.music_index + 1])
         self.max_x = self.player.rect.x
         self.score = 0
+        self.reset_interpolation()
 
-        if self.app.client_name == '':
+        if self.app.client is not None and self.app.client_name == '':
             self.app.connect(self.app.leader_board_menu.input_text(self.app.screen.copy()))
 
     def start_leaderboard(self):
+        if self.app.replaying:
+            return
         self.app.leader_board_menu.running = True
         self.app.leader_board_menu.run(self.screen.copy())
 
     def reset_object_lists(self):
-        self.objects = [self.player]
-        self.monsters = []
-        self.collider_objects = []
+        self.objects = ObjectRegistry()
+        self.objects.add(self.player)
         self.ui_objects = []
         self.drawing_objects = []
-        self.collision_rects = []
+        self.drawing_chunks = []
+        self.collision_grid.clear()
+        self.chunk_cache.clear()
 
     def go_back_to_menu(self):
         self.player.dead = False
         self.reset_object_lists()
-        menu_objects = self.map.generate_menu()
-        for menu_object in menu_objects:
-            self.add_object(menu_object)
+        self.add_chunk("menu", self.map.generate_menu())
         self.init_ui_menu()
         self.game_mode = "menu"
         self.player.gravity = 0
         self.player.rect.center = (-25, 300)
-        pg.mixer.music.load('assets/music/' + self.musics[0]),
-        pg.mixer.music.play()
+        if self.app.play_music:
+            self.music.play(self.musics[0])
+            self.music.prefetch(self.musics[1])
         self.music_index = 1
+        self.reset_interpolation()
 
     def start_settings(self):
         self.app.settings()
@@ -270,9 +294,7 @@ class Game:
             self.camera_looking_at = looking_point
         elif self.camera_following:
             if (distance := looking_point.distance_to(self.camera_looking_at)) > 5:
-                self.cam_dxy = ((looking_point - self.camera_looking_at).normalize() *
-                                self.camera_vel * distance / 100) * 60 / (fps if (fps := self.app.clock.get_fps()) > 15
-                                                                          else 60)
+                self.cam_dxy = (looking_point - self.camera_looking_at).normalize() * self.camera_vel * distance / 100
                 if self.camera_limits is None:
                     self.camera_looking_at += self.cam_dxy
                 else:
@@ -291,9 +313,9 @@ class Game:
         return -self.camera_looking_at + (1 / 2) * vec(self.screen.get_size())
 
     def init_ui_menu(self):
-        fonts = {"normal": pg.font.Font("assets/fonts/DISTRO__.ttf", 28),
-                 "bold": pg.font.Font("assets/fonts/DISTROB_.ttf", 33),
-                 "title_bold": pg.font.Font("assets/fonts/DISTROB_.ttf", 40)}
+        fonts = {"normal": assets.font("assets/fonts/DISTRO__.ttf", 28),
+                 "bold": assets.font("assets/fonts/DISTROB_.ttf", 33),
+                 "title_bold": assets.font("assets/fonts/DISTROB_.ttf", 40)}
         texts = [[(300, 40), "Controls", "bold"],
                  [(250, 100), f"Go left: {pg.key.name(self.player.KEYS['Left']).capitalize()}"],
                  [(250, 140), f"Go right: {pg.key.name(self.player.KEYS['Right']).capitalize()}"],
@@ -333,15 +355,83 @@ class Game:
                         enumerate(zip(["Play", "Settings", "Leaderboard", "Quit"], all_beacons))}
 
     def collision_algorithm(self, moving_object: DynamicObject):
-        environment = self.map.get_environment(moving_object)
+        with profiler.phase("collisions"):
+            environment = self.map.get_environment(moving_object)
+            vel = moving_object.vel.copy()
+            rect = moving_object.rect.copy()
+            moving_object.jumping = True
+            if moving_object.custom_collider != [0, 0, 0, 0]:
+                rect.topleft += vec(moving_object.custom_collider[:2])
+                rect.size = moving_object.custom_collider[2:]
+
+            # up to one tile per step, the colliders can't be skipped
+            n_sub_steps = ceil(max(abs(vel.x) / self.map.tile_size.x, abs(vel.y) / self.map.tile_size.y))
+            if n_sub_steps <= 1:
+                self.resolve_collisions(moving_object, rect, environment)
+                return
+
+            # above that, a tile could be skipped between two checks (or the furthest of two colliders could be taken),
+            # so the move is split in sub-steps of less than a tile in which the nearest collider is hit first
+            moved = vec(0, 0)
+            blocked_x, blocked_y = False, False
+            for i in range(n_sub_steps):
+                moving_object.vel = vec(
+                    0 if blocked_x else round(vel.x * (i + 1) / n_sub_steps) - round(vel.x * i / n_sub_steps),
+                    0 if blocked_y else round(vel.y * (i + 1) / n_sub_steps) - round(vel.y * i / n_sub_steps)
+                )
+                hit_x, hit_y = self.sweep_collisions(moving_object, rect, environment)
+                blocked_x, blocked_y = blocked_x or hit_x, blocked_y or hit_y
+                rect.move_ip(moving_object.vel)
+                moved += moving_object.vel
+            moving_object.vel = moved
+
+    def sweep_collisions(self, moving_object: DynamicObject, rect: pg.Rect, environment: str) -> tuple[bool, bool]:
+        # same rules as resolve_collisions, except that the collider with the earliest time of impact is taken
+        # (the time of impact is distance / velocity, between 0 and 2 with the tolerance of the algorithm)
         vel = moving_object.vel
-        rect = moving_object.rect.copy()
-        moving_object.jumping = True
-        if moving_object.custom_collider != [0, 0, 0, 0]:
-            rect.topleft += vec(moving_object.custom_collider[:2])
-            rect.size = moving_object.custom_collider[2:]
+        colliders = [c_rect for c_rect, collider in
+                     self.collision_grid.query(rect.inflate(4 * abs(vel.x) + 4, 4 * abs(vel.y) + 4))
+                     if not collider.DONT_COLLIDE]
+
+        hit_x = False
+        n_rect = rect.move(vel)
+        if vel.x != 0:
+            distances = [c_rect.left - rect.right if vel.x > 0 else c_rect.right - rect.left for c_rect in colliders
+                         if n_rect.top < c_rect.bottom - 1 and n_rect.bottom > c_rect.top + 1]
+            distances = [distance for distance in distances if 0 <= distance / vel.x <= 2]
+            if distances:
+                vel.x = min(distances, key=abs)
+                hit_x = True
+
+        # towards the top of the colliders (when the gravity is inverted, a still object goes up)
+        inverted = environment == "neon"
+        downwards = vel.y > 0 or (vel.y == 0 and not inverted)
+        landing = downwards != inverted
+        if landing and not (moving_object.gravity < 0 if inverted else moving_object.gravity > 0):
+            return hit_x, False
+
         n_rect = rect.move(vel)
-        for c_rect, collider in self.collision_rects:
+        distances = [c_rect.top - rect.bottom if downwards else c_rect.bottom - rect.top for c_rect in colliders
+                     if n_rect.left < c_rect.right and n_rect.right > c_rect.left]
+        distances = [distance for distance in distances if abs(distance - vel.y) <= abs(vel.y)]
+        if not distances:
+            return hit_x, False
+
+        vel.y = min(distances, key=abs)
+        if landing:
+            moving_object.gravity = 0
+            moving_object.jumping = False
+        elif moving_object.jumping:
+            moving_object.gravity = 0
+        return hit_x, True
+
+    def resolve_collisions(self, moving_object: DynamicObject, rect: pg.Rect, environment: str):
+        vel = moving_object.vel
+        n_rect = rect.move(vel)
+        # only the colliders around the object can be reached this frame (the margin covers the tolerance of
+        # the checks below, which accept colliders up to twice the velocity away)
+        colliders = self.collision_grid.query(rect.inflate(6 * abs(vel.x) + 4, 6 * abs(vel.y) + 4))
+        for c_rect, collider in colliders:
             if collider.DONT_COLLIDE:
                 continue
             if not (n_rect.top < c_rect.bottom - 1 and n_rect.bottom > c_rect.top + 1):
@@ -359,7 +449,7 @@ class Game:
 
         vel = moving_object.vel
         n_rect = rect.move(vel)
-        for c_rect, collider in self.collision_rects:
+        for c_rect, collider in colliders:
             if collider.DONT_COLLIDE:
                 continue
             if not (n_rect.left < c_rect.right and n_rect.right > c_rect.left):
@@ -390,13 +480,62 @@ class Game:
                         moving_object.gravity = 0
                         moving_object.jumping = False
 
-    def add_object(self, obj: Object2d):
-        # every time you add an object to the game, add it with this method
-        self.objects.append(obj)
-        if isinstance(obj, StaticObject) and not isinstance(obj, DynamicObject):
-            self.collider_objects.append(obj)
-        elif isinstance(obj, Monster):
-            self.monsters.append(obj)
+    def touches_spike(self, obj: DynamicObject) -> bool:
+        # the spikes are colliders (that don't collide), so only the ones around the object are found by the grid
+        for c_rect, collider in self.collision_grid.query(obj.rect):
+            if collider.tag == "spike" and c_rect.colliderect(obj.rect) and self.map.collide_spike_player(obj, collider):
+                return True
+        return False
+
+    def add_object(self, obj: Object2d, chunk: tuple[int, int] | str | None = None):
+        # every time you add an object to the game, add it with this method (chunk is the chunk of the map the object
+        # is a tile of, if it is one)
+        self.objects.add(obj, chunk)
+        if obj in self.objects.colliders:
+            self.collision_grid.add(obj)
+
+    def add_chunk(self, chunk: tuple[int, int] | str, objects: list[Object2d]):
+        # adds the objects of a chunk the map just generated, the map then shares the view of the registry on this
+        # chunk, so that the objects removed from the game are removed from the map as well
+        for obj in objects:
+            self.add_object(obj, chunk)
+        if chunk in self.map.generated_chunks:
+            self.map.generated_chunks[chunk] = self.objects.chunks.setdefault(chunk, {})
+        if chunk in self.objects.chunks:
+            # baked before the chunk can be seen (see ChunkSurfaceCache)
+            neon = self.map.get_environment(self.player) == "neon" or \
+                (isinstance(chunk, tuple) and self.map.get_chunk_environment(chunk) == "neon")
+            self.chunk_cache.prepare(chunk, self.objects.chunks[chunk], neon)
+
+    def remove_object(self, obj: Object2d):
+        # every time you remove an object from the game, remove it with this method
+        chunk = self.objects.remove(obj)
+        if chunk is not None:
+            self.chunk_cache.invalidate(chunk, [obj])
+        if chunk is not None and chunk == self.map.get_chunk(vec(obj.rect.center)) and chunk in self.map.chunks:
+            # the tile is dead, so it mustn't be generated again
+            self.map.remove_tile(vec(obj.rect.topleft))
+        self.collision_grid.remove(obj)
+
+    def unload_chunks(self, current_chunk: tuple[int, int]):
+        # removes all at once every object left in the chunks that the map just unloaded (the tiles, but also the
+        # monsters, the bullets...)
+        if not self.map.unload_chunks(current_chunk):
+            return
+        removed = set()
+        for chunk in [chunk for chunk in self.objects.chunks
+                      if isinstance(chunk, tuple) and not self.map.is_loaded(chunk[0])]:
+            chunk_objects = self.objects.remove_chunk(chunk)
+            self.chunk_cache.invalidate(chunk, chunk_objects)
+            removed.update(chunk_objects)
+        removed.update(obj for obj in self.objects if obj is not self.player and obj not in self.objects.chunk_of and
+                       not self.map.is_loaded(self.map.get_chunk(vec(obj.rect.center))[0]))
+        if not removed:
+            return
+        for obj in removed:
+            self.objects.remove(obj)
+            self.collision_grid.remove(obj)
+        self.drawing_objects = [obj for obj in self.drawing_objects if obj not in removed]
 
     def handle_events(self, event: pg.event.Event):
         # handle events for every object in the game
@@ -426,104 +565,51 @@ class Game:
             self.drawing_objects.remove(self.player)
             self.drawing_objects.append(self.player)
 
-        for obj in self.drawing_objects:
-            if not obj.rect.move(self.scroll).colliderect(screen_rect) or obj.DONT_DRAW_PERSPECTIVE:
-                continue
-
-            length3d = obj.length3d if hasattr(obj, "length3d") else 10
-
-            if hasattr(obj, "tag") and obj.tag == "spike":
-                # print(obj, obj.tag, obj.style)
+        visible = [obj for obj in self.drawing_objects
+                   if obj.rect.move(self.scroll).colliderect(screen_rect) and not obj.DONT_DRAW_PERSPECTIVE]
+        is_spike = [hasattr(obj, "tag") and obj.tag == "spike" for obj in visible]
+        # the geometry of every face is computed at once, only the polygons are drawn one by one
+        spike_faces = iter(get_spike_faces([obj for obj, spike in zip(visible, is_spike) if spike],
+                                           self.scroll, vanishing_point))
+        box_faces = iter(get_box_faces([obj for obj, spike in zip(visible, is_spike) if not spike],
+                                       self.scroll, vanishing_point))
+        neon_environment = self.environment == "neon"
+
+        for obj, spike in zip(visible, is_spike):
+            if spike:
                 func = neon_polygon if hasattr(obj, "style") and obj.style == "neon" else polygon
-
-                pos_left = vec(obj.rect.topleft) + vec(0, obj.surface.get_height()) + self.scroll
-                pos_right = vec(obj.rect.topleft) + vec(obj.surface.get_width(), obj.surface.get_height()) + self.scroll
-                pos_top = vec(obj.rect.topleft) + vec(obj.surface.get_width() / 2,
-                                                      obj.surface.get_height() * 0.13) + self.scroll
                 color = obj.color
+                right_face, left_face, bottom_face, only_right, only_left, only_bottom, nearest = next(spike_faces)
 
-                vector_left = (vanishing_point - pos_left) / length3d
-                vector_right = (vanishing_point - pos_right) / length3d
-                vector_top = (vanishing_point - pos_top) / length3d
-                vectors = [vector_left, vector_right, vector_top]
-
-                if vector_left[0] > 0 > vector_left[1] and -1.7 < vector_left[1] / vector_left[0] < 0:
-                    func(self.screen, change(color, 0.8),
-                         (pos_right, pos_right + vector_right, pos_top + vector_top, pos_top))
+                if only_right:
+                    func(self.screen, change(color, 0.8), right_face)
                     continue
-                if vector_right[0] < 0 < vector_right[1] / vector_right[0] < 1.7 and vector_left[1] < 0:
-                    func(self.screen, change(color, 0.5),
-                         (pos_left, pos_left + vector_left, pos_top + vector_top, pos_top))
+                if only_left:
+                    func(self.screen, change(color, 0.5), left_face)
                     continue
-
-                if vector_top[1] > 0 and (
-                        vector_top[1] / vector_top[0] > 1.7 if vector_top[0] > 0 else vector_top[1] / vector_top[
-                            0] < -1.7) and not self.map.has_neighbour('bottom', obj):
-                    func(self.screen, change(color, 0.75),
-                         (pos_left, pos_left + vector_left, pos_right + vector_right, pos_right))
+                if only_bottom and not self.map.has_neighbour('bottom', obj):
+                    func(self.screen, change(color, 0.75), bottom_face)
                     continue
 
-                vectors = sorted(vectors, key=lambda x: x[0] ** 2 + x[1] ** 2)
-
-                if vectors[0] == vector_left:
+                if nearest == 0:
                     if not self.map.has_neighbour('bottom', obj):
-                        func(self.screen, change(color, 0.75),
-                             (pos_left, pos_left + vector_left, pos_right + vector_right, pos_right))
-                    func(self.screen, change(color, 0.5),
-                         (pos_left, pos_left + vector_left, pos_top + vector_top, pos_top))
-                elif vectors[0] == vector_right:
+                        func(self.screen, change(color, 0.75), bottom_face)
+                    func(self.screen, change(color, 0.5), left_face)
+                elif nearest == 1:
                     if not self.map.has_neighbour('bottom', obj):
-                        func(self.screen, change(color, 0.75),
-                             (pos_left, pos_left + vector_left, pos_right + vector_right, pos_right))
-                    func(self.screen, change(color, 0.8),
-                         (pos_right, pos_right + vector_right, pos_top + vector_top, pos_top))
+                        func(self.screen, change(color, 0.75), bottom_face)
+                    func(self.screen, change(color, 0.8), right_face)
                 else:
-                    func(self.screen, change(color, 0.8),
-                         (pos_right, pos_right + vector_right, pos_top + vector_top, pos_top))
-                    func(self.screen, change(color, 0.5),
-                         (pos_left, pos_left + vector_left, pos_top + vector_top, pos_top))
+                    func(self.screen, change(color, 0.8), right_face)
+                    func(self.screen, change(color, 0.5), left_face)
             else:
-                func = neon_polygon if (hasattr(obj, "style") and obj.style == "neon") or \
-                                       (self.map.get_environment(self.player) == "neon") else polygon
-
-                pos = vec(obj.rect.topleft) + self.scroll
-                w, h = obj.rect.w, obj.rect.h
+                func = neon_polygon if (hasattr(obj, "style") and obj.style == "neon") or neon_environment else polygon
+                colors = self.chunk_cache.get_face_colors(obj) if ChunkSurfaceCache.is_static_tile(obj) else None
 
-                vector = vanishing_point - pos
-                cond = vector[0] > w / 2, vector[1] > h / 2
-                way = ['bottom' if cond[1] else 'top', 'right' if cond[0] else 'left']
-
-                vector -= vec(w * cond[0], h * cond[1])
-                pos += vec(w * cond[0], h * cond[1])
-
-                vectors = {'left': vec(vector - vec(w, 0)) / length3d,
-                           'right': vec(vector + vec(w, 0)) / length3d,
-                           'top': vec(vector - vec(0, h)) / length3d,
-                           'bottom': vec(vector + vec(0, h)) / length3d}
-
-                vector /= length3d
-
-                point = {'left': vec(w, 0),
-                         'right': -vec(w, 0),
-                         'top': vec(0, h),
-                         'bottom': -vec(0, h)}
-
-                colors = {
-                    'left': obj.get_color('left'),
-                    'right': obj.get_color('right'),
-                    'top': obj.get_color('top'),
-                    'bottom': obj.get_color('bottom')}
-
-                conditions = {'left': vector[0] < 0,
-                              'right': vector[0] > 0,
-                              'top': vector[1] < 0,
-                              'bottom': vector[1] > 0}
-
-                for i in range(0, 2):
-                    if (not self.map.has_neighbour(way[i], obj) or obj == self.player or obj in self.monsters) and conditions[way[i]]:
-                        func(self.screen, colors[way[i]], (pos, pos + point[way[-i + 1]],
-                                                           pos + point[way[-i + 1]] + vectors[way[-i + 1]],
-                                                           pos + vector))
+                for direction, seen, face in next(box_faces):
+                    if seen and (not self.map.has_neighbour(direction, obj) or obj == self.player or
+                                 obj in self.objects.monsters):
+                        func(self.screen, colors[direction] if colors is not None else obj.get_color(direction), face)
 
     def show_transparent_text(self, texts, degree):
         for txt in texts:
@@ -540,9 +626,28 @@ class Game:
             self.screen.blit(surf2, txt.shadow_rect)
             self.screen.blit(surf1, txt.rect)
 
-    def draw_background(self):
-        environment = self.map.get_environment(self.player)
+    def update_transition(self):
+        # fades the music out during the first half of a transition chunk, then crossfades to the next music (its
+        # lead-in decoded in advance, see MusicController) and speeds the player up when going back to the
+        # normal dimension
         transition = self.map.get_transition(self.player)
+        if transition[0] == "none" or not self.app.play_music:
+            return
+
+        if transition[1] <= 0.5:
+            self.music.set_volume(-transition[1]*2+1)
+        elif self.music_index % 3 == {"transition_to_normal": 0,
+                                      "transition_to_moon": 1,
+                                      "transition_to_neon": 2}[transition[0]]:
+            self.music_index += 1
+            self.music.play(self.musics[min(self.music_index, len(self.musics)-1)])
+            self.music.prefetch(self.musics[min(self.music_index + 1, len(self.musics)-1)])
+            if transition[0] == "transition_to_normal":
+                self.player.vel_acc += 0.25
+
+    def draw_background(self):
+        environment = self.environment
+        transition = self.transition
 
         if environment == "normal":
             self.screen.fill((135, 206, 235))
@@ -571,26 +676,9 @@ class Game:
             elif transition[0] == 'transition_to_normal':
                 self.backgrounds[environment].draw(self.screen, self.cam_dxy,
                                                    offset=vec(-(1 - transition[1]) * self.screen.get_width() * 2.5, 0))
-                if self.app.play_music:
-                    if transition[1] <= 0.5:
-                        pg.mixer.music.set_volume(-transition[1]*2+1)
-                    elif self.music_index % 3 == 0:
-                        self.music_index += 1
-                        pg.mixer.music.load('assets/music/'+self.musics[min(self.music_index, len(self.musics)-1)])
-                        pg.mixer.music.set_volume(1)
-                        pg.mixer.music.play()
-                        self.player.vel_acc += 0.25
             elif transition[0] == 'transition_to_moon':
                 self.backgrounds[environment].draw(self.screen, self.cam_dxy,
                                                    offset=vec(-transition[1] * self.screen.get_width() * 2.5, 0))
-                if self.app.play_music:
-                    if transition[1] <= 0.5:
-                        pg.mixer.music.set_volume(-transition[1]*2+1)
-                    elif self.music_index % 3 == 1:
-                        self.music_index += 1
-                        pg.mixer.music.load('assets/music/'+self.musics[min(self.music_index, len(self.musics)-1)])
-                        pg.mixer.music.set_volume(1)
-                        pg.mixer.music.play()
                 self.backgrounds[environment].draw(self.screen, self.cam_dxy,
                                                    offset=vec(-transition[1] * self.screen.get_width() * 2.5, 0))
                 self.backgrounds["moon"].update_alpha(transition[1])
@@ -599,14 +687,6 @@ class Game:
             elif transition[0] == "transition_to_neon":
                 self.backgrounds["moon"].update_alpha(1 - transition[1])
                 self.backgrounds["moon"].draw(self.screen, self.cam_dxy)
-                if self.app.play_music:
-                    if transition[1] <= 0.5:
-                        pg.mixer.music.set_volume(-transition[1]*2+1)
-                    elif self.music_index % 3 == 2:
-                        self.music_index += 1
-                        pg.mixer.music.load('assets/music/'+self.musics[min(self.music_index, len(self.musics)-1)])
-                        pg.mixer.music.set_volume(1)
-                        pg.mixer.music.play()
                 self.show_transparent_text(self.transition_texts[transition[0]], transition[1])
             else:
                 self.backgrounds[environment].draw(self.screen, self.cam_dxy)
@@ -616,11 +696,11 @@ class Game:
             if ui_object.IN_BACKGROUND:
                 ui_object.draw(self.screen, offset=pg.Vector2(0, 0) if ui_object.FIXED else self.scroll)
 
-        if self.map.get_environment(self.player) == "neon":
+        if self.environment == "neon":
             self.screen.fill((0, 0, 0))
 
     def init_death_screen(self):
-        fonts = pg.font.Font("assets/fonts/DISTROB_.ttf", 25), pg.font.Font("assets/fonts/DISTROB_.ttf", 80)
+        fonts = assets.font("assets/fonts/DISTROB_.ttf", 25), assets.font("assets/fonts/DISTROB_.ttf", 80)
         self.ui_objects = []
         self.ui_objects.extend((BlackLayer((0, 0), self.screen.get_size()),
                                 Text((self.screen.get_width()//2, int(self.screen.get_height()*3/7)-50),
@@ -644,51 +724,61 @@ class Game:
         self.player_death_sound.play()
         self.init_death_screen()
 
-    def routine(self):
-        # print(self.scroll)
+    def reset_interpolation(self):
+        # the frames drawn until the next step stay at the current positions (after a teleport or a new scene, they
+        # would be drawn in between the old positions and the new ones)
+        self.last_positions = {obj: obj.rect.topleft for obj in self.objects if isinstance(obj, DynamicObject)}
+        self.last_scroll = self.scroll.copy()
+
+    def step(self):
+        # one step of the simulation (1 / App.TICK_RATE second), nothing is drawn here (see render)
         self.screen = self.app.screen
-        # self.game_mode = self.map.get_environment(self.player)
+
+        # positions at the beginning of the step, to draw the frames in between two steps
+        self.reset_interpolation()
+
         if not self.map.menu:
             if self.player.rect.x > self.max_x:
                 self.score += (self.player.rect.x - self.max_x) / 10
                 self.max_x = self.player.rect.x
 
-        # update the scroll value (for camera)
-        self.draw_background()
+        profiler.count("steps")
+        with profiler.phase("transition"):
+            self.update_transition()
 
         # update the camera
-        self.scroll = self.get_scroll()
-
-        # get collision rects for this frame
-        self.collision_rects = [
-            (pg.Rect(
-                collider.rect[0] + collider.custom_collider[0] * (cond := (collider.custom_collider != [0, 0, 0, 0])),
-                collider.rect[1] + collider.custom_collider[1] * cond,
-                collider.custom_collider[2] if cond else collider.rect[2],
-                collider.custom_collider[3] if cond else collider.rect[3]), collider) for collider in
-            self.collider_objects]
-
-        self.drawing_objects = [self.player] if self.player in self.objects else []
-        current_chunk = self.map.get_current_chunk(vec(self.player.rect.topleft))
-        translations = [(0, 0), (-1, -1), (-1, 0), (-1, 1), (0, 1), (1, 1), (1, 0), (-1, 1), (0, -1), (1, -1)]
-        if self.map.menu:
-            self.drawing_objects.extend(self.map.generated_chunks["menu"])
-            translations = [(-1, 0), (1, 0)]
-            if current_chunk != (0, 0):
-                translations.append((0, 0))
-        elif self.map.horizontal_only:
-            translations = [(0, 0), (1, 0), (-1, 0)]
-        elif self.map.vertical_only:
-            translations = [(0, 0), (0, -1), (0, 1)]
-        if self.map.get_environment(self.player) == "moon" and current_chunk[1] == -1:
-            translations.extend([(0, 1), (-1, 1), (1, 1)])
-        for translation in translations:
-            working_chunk = self.map.get_current_chunk_objects(current_chunk[0] + translation[0],
-                                                               current_chunk[1] + translation[1])
-            if working_chunk[1]:
-                for obj in working_chunk[0]:
-                    self.add_object(obj)
-            self.drawing_objects.extend(working_chunk[0])
+        with profiler.phase("scroll"):
+            self.scroll = self.get_scroll()
+
+        with profiler.phase("chunks"):
+            self.drawing_objects = [self.player] if self.player in self.objects else []
+            self.drawing_chunks = []
+            current_chunk = self.map.get_current_chunk(vec(self.player.rect.topleft))
+            translations = [(0, 0), (-1, -1), (-1, 0), (-1, 1), (0, 1), (1, 1), (1, 0), (-1, 1), (0, -1), (1, -1)]
+            if self.map.menu:
+                self.drawing_objects.extend(self.map.generated_chunks["menu"])
+                self.drawing_chunks.append("menu")
+                translations = [(-1, 0), (1, 0)]
+                if current_chunk != (0, 0):
+                    translations.append((0, 0))
+            elif self.map.horizontal_only:
+                translations = [(0, 0), (1, 0), (-1, 0)]
+            elif self.map.vertical_only:
+                translations = [(0, 0), (0, -1), (0, 1)]
+            if self.map.get_environment(self.player) == "moon" and current_chunk[1] == -1:
+                translations.extend([(0, 1), (-1, 1), (1, 1)])
+            for translation in translations:
+                working_chunk = self.map.get_current_chunk_objects(current_chunk[0] + translation[0],
+                                                                   current_chunk[1] + translation[1])
+                if working_chunk[1]:
+                    profiler.count("chunks_generated")
+                    self.add_chunk((current_chunk[0] + translation[0], current_chunk[1] + translation[1]),
+                                   working_chunk[0])
+                self.drawing_objects.extend(working_chunk[0])
+                if (key := self.map.get_chunk_key(current_chunk[0] + translation[0],
+                                                  current_chunk[1] + translation[1])) in self.objects.chunks:
+                    self.drawing_chunks.append(key)
+            self.unload_chunks(current_chunk)
 
         # check for interaction with the beacons (interactive in-game buttons)
         if self.game_mode == "menu":
@@ -702,72 +792,33 @@ class Game:
         # update all objects
         to_remove = []
 
-        # Update all objects, and add them to the draw
-        for obj in self.objects:
-            upd = obj.update()
-            if hasattr(obj, "tag") and obj.tag == "spike" and not self.player.dead:
-                if self.map.collide_spike_player(self.player, obj):
-                    self.kill_player()
+        # Update all objects
+        with profiler.phase("update"):
+            for obj in self.objects:
+                upd = obj.update()
 
-            if upd == "kill":
-                to_remove.append((obj, self.map.get_chunk(vec(obj.rect.center))))
-            elif obj.ABSOLUTE_DRAW:  # draw the objects that are not included in the map
-                self.drawing_objects.append(obj)
-            elif obj.DONT_DRAW and obj in self.drawing_objects:
-                self.drawing_objects.remove(obj)
-
-        # Remove all the objects that have to be removed
-        for obj, chunk in to_remove:
-            if obj in self.objects:
-                self.objects.remove(obj)
-            if chunk in self.map.generated_chunks and obj in self.map.generated_chunks[chunk]:
-                self.map.chunks[chunk][(idx := self.map.get_index_from_co(vec(obj.rect.topleft))[:2])[0]][
-                    idx[1]] = 0
-                self.map.generated_chunks[chunk].remove(obj)
-            if obj in self.collider_objects:
-                self.collider_objects.remove(obj)
+                if upd == "kill":
+                    to_remove.append(obj)
+                elif not obj.ABSOLUTE_DRAW and obj.DONT_DRAW and obj in self.drawing_objects:
+                    self.drawing_objects.remove(obj)
 
-        # draw perspective
-        self.draw_perspective()
-
-        # draw all see able objects
-        for obj in self.drawing_objects:
-            if (hasattr(obj, "tag") and obj.tag == "neon") or self.map.get_environment(self.player) == "neon":
-                if obj.tag != "spike":
-                    neon_polygon(self.screen, obj.color, [
-                        vec(obj.rect.topleft) + self.scroll,
-                        vec(obj.rect.topright) + self.scroll,
-                        vec(obj.rect.bottomright) + self.scroll,
-                        vec(obj.rect.bottomleft) + self.scroll
-                    ])
-                else:
-                    neon_polygon(self.screen, obj.color, [
-                        vec(obj.rect.bottomleft) + self.scroll,
-                        vec(obj.rect.bottomright) + self.scroll,
-                        vec(obj.rect.x + obj.rect.w / 2, obj.rect.y + obj.rect.h * 0.13) + self.scroll
-                    ])
-            else:
-                obj.draw(self.screen, self.scroll)
+            # the player is the first object updated, so it can be checked against the spikes once everything moved
+            if not self.player.dead and self.touches_spike(self.player):
+                self.kill_player()
+        # the objects added during the loop have been updated as well, and none has been removed yet
+        profiler.count("objects_updated", len(self.objects))
 
-        # draw the UI (the UiObjects not contained in the Background)
-        for ui_object in self.ui_objects:
-            if not ui_object.IN_BACKGROUND:
-                if isinstance(ui_object, Button):
-                    ui_object.draw(self.screen, offset=pg.Vector2(0, 0) if ui_object.FIXED else self.scroll,
-                                   play_sound=self.app.play_sound)
-                else:
-                    ui_object.draw(self.screen, offset=pg.Vector2(0, 0) if ui_object.FIXED else self.scroll)
+        # Remove all the objects that have to be removed (the bullets leave the monsters as well)
+        with profiler.phase("removal"):
+            for obj in to_remove:
+                self.remove_object(obj)
 
-        if not self.player.chad:
-            if self.map.menu:
-                if self.player.rect.colliderect(self.chad_easter_egg_rect):
-                    self.player.chad = True
-                self.app.screen.blit(self.chad_easter_egg,
-                                     self.chad_easter_egg_rect.topleft + self.scroll)
+            # draw the objects that are not included in the map
+            self.drawing_objects.extend(self.objects.absolute_draw)
 
-        if not self.map.menu:
-            self.score_text.modify_content(f"Score : {round(self.score)}")
-            self.score_text.draw(self.app.screen)
+        if not self.player.chad and self.map.menu:
+            if self.player.rect.colliderect(self.chad_easter_egg_rect):
+                self.player.chad = True
 
         if self.last_frame_score == self.score:
             self.not_moving_frames += 1
@@ -785,6 +836,89 @@ class Game:
         elif self.player.rect.y < - 100 and not self.player.dead and self.map.get_environment(self.player) == "neon":
             self.kill_player()
         if not self.player.dead:
-            for monster in self.monsters:
+            for monster in self.objects.monsters:
                 if monster.rect.colliderect(self.player.rect):
                     self.kill_player()
+
+        game_clock.advance(self.app.step_time * 1000)
+
+    def render(self, alpha: float = 1):
+        # draws the game in between the last two steps of the simulation (alpha is the progression from one to the
+        # other), by moving the dynamic objects and the camera back there for the time of the drawing
+        self.screen = self.app.screen
+        self.music.update()
+        positions = {}
+        for obj, last_position in self.last_positions.items():
+            positions[obj] = obj.rect.topleft
+            obj.rect.topleft = vec(last_position).lerp(obj.rect.topleft, alpha)
+        scroll = self.scroll
+        self.scroll = self.last_scroll.lerp(scroll, alpha)
+        self.environment = self.map.get_environment(self.player)
+        self.transition = self.map.get_transition(self.player)
+
+        with profiler.phase("background"):
+            self.draw_background()
+
+        # draw perspective
+        with profiler.phase("perspective"):
+            self.draw_perspective()
+
+        # draw all see able objects, the static tiles being drawn chunk by chunk
+        with profiler.phase("draw"):
+            neon = self.environment == "neon"
+            for chunk in dict.fromkeys(self.drawing_chunks):
+                surface, topleft = self.chunk_cache.get(chunk, self.objects.chunks.get(chunk, {}), neon)
+                self.screen.blit(surface, (floor(topleft.x + self.scroll.x), floor(topleft.y + self.scroll.y)))
+                profiler.count("blits")
+            for obj in self.drawing_objects:
+                if ChunkSurfaceCache.is_static_tile(obj) and obj in self.objects.chunk_of:
+                    continue
+                if (hasattr(obj, "tag") and obj.tag == "neon") or neon:
+                    if obj.tag != "spike":
+                        neon_polygon(self.screen, obj.color, [
+                            vec(obj.rect.topleft) + self.scroll,
+                            vec(obj.rect.topright) + self.scroll,
+                            vec(obj.rect.bottomright) + self.scroll,
+                            vec(obj.rect.bottomleft) + self.scroll
+                        ])
+                    else:
+                        neon_polygon(self.screen, obj.color, [
+                            vec(obj.rect.bottomleft) + self.scroll,
+                            vec(obj.rect.bottomright) + self.scroll,
+                            vec(obj.rect.x + obj.rect.w / 2, obj.rect.y + obj.rect.h * 0.13) + self.scroll
+                        ])
+                else:
+                    obj.draw(self.screen, self.scroll)
+                    profiler.count("blits")
+            # one of the chunks generated ahead of the player
+            self.chunk_cache.bake_next()
+
+        # draw the UI (the UiObjects not contained in the Background)
+        with profiler.phase("ui"):
+            for ui_object in self.ui_objects:
+                if not ui_object.IN_BACKGROUND:
+                    if isinstance(ui_object, Button):
+                        ui_object.draw(self.screen, offset=pg.Vector2(0, 0) if ui_object.FIXED else self.scroll,
+                                       play_sound=self.app.play_sound)
+                    else:
+                        ui_object.draw(self.screen, offset=pg.Vector2(0, 0) if ui_object.FIXED else self.scroll)
+                    profiler.count("blits")
+
+            if not self.player.chad and self.map.menu:
+                self.app.screen.blit(self.chad_easter_egg,
+                                     self.chad_easter_egg_rect.topleft + self.scroll)
+                profiler.count("blits")
+
+            if not self.map.menu:
+                self.score_text.modify_content(f"Score : {round(self.score)}")
+                self.score_text.draw(self.app.screen)
+                profiler.count("blits")
+
+        for obj, position in positions.items():
+            obj.rect.topleft = position
+        self.scroll = scroll
+
+    def routine(self):
+        # one step of the simulation, and its drawing
+        self.step()
+        self.render()
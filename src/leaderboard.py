@@ -1,5 +1,5 @@
 import pygame as pg
-from .objects import Text, Button
+from .objects import Text, Button, text_cache, assets
 
 
 class LeaderBoard:
@@ -9,9 +9,9 @@ class LeaderBoard:
         self.w, self.h = self.app.screen.get_size()
         self.running = True
 
-        title_font = pg.font.Font("assets/fonts/DISTROB_.ttf", 55)
-        self.button_font = pg.font.Font("assets/fonts/DISTROB_.ttf", 35)
-        self.board_font = pg.font.Font("assets/fonts/DISTRO__.ttf", 20)
+        title_font = assets.font("assets/fonts/DISTROB_.ttf", 55)
+        self.button_font = assets.font("assets/fonts/DISTROB_.ttf", 35)
+        self.board_font = assets.font("assets/fonts/DISTRO__.ttf", 20)
 
         quit_text = Text((0, 0), self.button_font, "Quit", pg.Color(255, 255, 255), shadow_=(2, 2))
         refresh_text = Text((0, 0), self.button_font, "Refresh", pg.Color(255, 255, 255), shadow_=(2, 2))
@@ -29,6 +29,8 @@ class LeaderBoard:
         ]
 
         self.data_length = 1
+        # version of the leaderboard of the service drawn (see LeaderboardService)
+        self.board_version = -1
 
     def text_template(self, dx, dy, txt):
         return Text((dx, dy), self.board_font, txt, pg.Color(255, 255, 255), shadow_=(2, 2))
@@ -37,7 +39,7 @@ class LeaderBoard:
         running = True
         black_layer = pg.Surface(last_frame.get_size())
         black_layer.set_alpha(128)
-        font = pg.font.Font("assets/fonts/DISTRO__.ttf", 30)
+        font = assets.font("assets/fonts/DISTRO__.ttf", 30)
         info = font.render("Type your username.", True, (0, 0, 0))
         info2 = font.render("Press ENTER to confirm and ESCAPE to cancel.", True, (0, 0, 0))
         txt = ""
@@ -68,7 +70,7 @@ class LeaderBoard:
                                                            self.w // 2,
                                                            self.h // 2],
                          border_radius=8)
-            txt_render = self.button_font.render(txt, True, (255, 255, 255))
+            txt_render = text_cache.render(self.button_font, txt, (255, 255, 255))
             self.app.screen.blit(txt_render, txt_render.get_rect(center=(self.w // 2, self.h // 2 + 25)))
             self.app.screen.blit(info, info.get_rect(center=(self.w // 2, int(self.h // 2 - self.h * 1.5 / 9))))
             self.app.screen.blit(info2, info2.get_rect(center=(self.w // 2, self.h // 2 - self.h // 10)))
@@ -84,6 +86,12 @@ class LeaderBoard:
         return ""
 
     def generate_board(self):
+        self.data_length = 1
+        if self.app.client is not None and not self.app.leaderboard_service.loaded:
+            return [
+                Text((self.w // 2, self.h // 2), self.board_font, "Loading the leaderboard...",
+                     pg.Color(255, 255, 255), centered=True, shadow_=(2, 2))
+            ]
         if self.app.client is None or self.app.leader_board is None:
             return [
                 Text((self.w // 2, self.h // 2), self.board_font, "An error occurred when loading the leaderboard.",
@@ -95,20 +103,21 @@ class LeaderBoard:
         board = self.app.leader_board
         dy = self.h * 2 / 10 + 25
 
+        top = board.top(7)
         for i in range(7):
-            if i > len(board) - 1:
+            if i > len(top) - 1:
                 user_name, score = "...", "..."
             else:
-                user_name, score = board[i]
+                user_name, score = top[i]
             texts.append(self.text_template(self.w // 6, dy, str(i + 1)+"."))
             texts.append(self.text_template(self.w // 6 + 50, dy, user_name))
             texts.append(self.text_template(self.w * 8 / 10, dy, str(score)))
             dy += h / 10
 
-        if self.app.get_rank(self.app.client_name) != -1:
-            texts.append(self.text_template(self.w // 6, dy, str(self.app.get_rank(self.app.client_name)+1)+"."))
+        if (rank := board.get_rank(self.app.client_name)) != -1:
+            texts.append(self.text_template(self.w // 6, dy, str(rank+1)+"."))
             texts.append(self.text_template(self.w // 6 + 50, dy, self.app.client_name+" (You)"))
-            texts.append(self.text_template(self.w * 8 / 10, dy, str(self.leader_board[self.app.get_rank(self.app.client_name)][1])))
+            texts.append(self.text_template(self.w * 8 / 10, dy, str(board.get_score(self.app.client_name))))
         else:
             texts.append(self.text_template(self.w // 6, dy, "You are unranked."))
 
@@ -120,8 +129,13 @@ class LeaderBoard:
         self.running = False
 
     def refresh(self):
+        # the board is drawn again when the leaderboard asked for arrives (see run)
+        self.app.get_leaderboard()
+        self.update_board()
+
+    def update_board(self):
         if self.app.client is not None:
-            self.app.get_leaderboard()
+            self.board_version = self.app.leaderboard_service.version
             self.leader_board = self.app.leader_board
             if len(self.ui_objects) > 3:
                 self.ui_objects = self.ui_objects[:-self.data_length]
@@ -146,7 +160,8 @@ class LeaderBoard:
 
             self.app.screen.blit(last_frame, (0, 0))
             self.app.screen.blit(black_layer, (0, 0))
-            self.leader_board = self.app.leader_board
+            if self.app.client is not None and self.app.leaderboard_service.version != self.board_version:
+                self.update_board()
 
             for ui_object in self.ui_objects:
                 if hasattr(ui_object, "update"):
@@ -0,0 +1,215 @@
+import json
+import os
+from bisect import bisect_left, insort
+from queue import Queue, Empty
+from threading import Thread, Lock
+from time import monotonic
+
+
+class LeaderboardIndex:
+
+    """
+    Scores of the leaderboard, sorted from the best one.
+
+    The entries are kept as (-score, order, name), order being the place of the entry in the list given (or the order
+    in which it has been added), so that equal scores stay in that order. best keeps the best entry of each name : the
+    rank of a name is found by bisection, and the top of the board is a slice.
+    """
+
+    def __init__(self, entries: list[list] = ()):
+        self.entries: list[tuple[int, int, str]] = sorted((-score, order, name)
+                                                          for order, (name, score) in enumerate(entries))
+        self.best: dict[str, tuple[int, int, str]] = {}
+        for entry in self.entries:
+            self.best.setdefault(entry[2], entry)
+        self.next_order = len(self.entries)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def copy(self) -> "LeaderboardIndex":
+        index = LeaderboardIndex()
+        index.entries = self.entries.copy()
+        index.best = self.best.copy()
+        index.next_order = self.next_order
+        return index
+
+    def add(self, name: str, score: int):
+        entry = (-score, self.next_order, name)
+        self.next_order += 1
+        insort(self.entries, entry)
+        if name not in self.best or entry < self.best[name]:
+            self.best[name] = entry
+
+    def get_rank(self, name: str) -> int:
+        # rank of the best score of the name (from 0), -1 if it isn't on the board
+        if (entry := self.best.get(name)) is None:
+            return -1
+        return bisect_left(self.entries, entry)
+
+    def get_score(self, name: str) -> int | None:
+        return -self.best[name][0] if name in self.best else None
+
+    def top(self, k: int) -> list[tuple[str, int]]:
+        return [(name, -score) for score, _, name in self.entries[:k]]
+
+
+class ScoreQueue:
+
+    """
+    Scores waiting to be uploaded, kept in a file (one JSON [name, score] per line) so that they survive a network
+    failure or the game being closed before they're sent.
+
+    add appends the score to the file right away. get_best gives the best pending score of each name (the only one
+    worth uploading), and remove forgets the scores of a name up to the one uploaded, by writing the file again.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = Lock()
+        self.scores: list[list] = []
+        try:
+            with open(path) as file:
+                for line in file:
+                    try:
+                        name, score = json.loads(line)
+                    except ValueError:
+                        # line cut by a crash while it was written
+                        continue
+                    self.scores.append([name, score])
+        except FileNotFoundError:
+            pass
+
+    def __len__(self):
+        return len(self.scores)
+
+    def add(self, name: str, score: int):
+        with self.lock:
+            self.scores.append([name, score])
+            with open(self.path, "a") as file:
+                file.write(json.dumps([name, score]) + "\n")
+                file.flush()
+                os.fsync(file.fileno())
+
+    def get_best(self) -> dict[str, int]:
+        with self.lock:
+            best = {}
+            for name, score in self.scores:
+                if name not in best or score > best[name]:
+                    best[name] = score
+            return best
+
+    def remove(self, name: str, score: int):
+        with self.lock:
+            self.scores = [[name_, score_] for name_, score_ in self.scores if name_ != name or score_ > score]
+            # written next to the file then moved, the file is never left half written
+            with open(self.path + ".tmp", "w") as file:
+                file.writelines(json.dumps(entry) + "\n" for entry in self.scores)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(self.path + ".tmp", self.path)
+
+
+class LeaderboardService(Thread):
+
+    """
+    Talks to the leaderboard server from its own thread, so that the game never waits for the network.
+
+    refresh and post_score only queue a request : the thread does them one after the other with the client (connected
+    once, with the timeout it has been made with), and keeps the last leaderboard received in leader_board (indexed
+    by a LeaderboardIndex, None until one is received : a failed refresh keeps the last one). It is never changed in
+    place : a new index replaces it, so that it can be read from the other threads. loaded tells if an answer has been
+    received yet, and version increases each time leader_board is updated, for the menus to draw it again.
+    The scores posted go through a ScoreQueue, written by the thread too (the game never waits for the disk either) :
+    the thread uploads the best pending score of each name, and when an upload fails (no answer, or an answer that
+    isn't a dict without error) it tries again later, waiting twice as long each time (RETRY_DELAY to MAX_RETRY_DELAY
+    seconds).
+    """
+
+    RETRY_DELAY = 2
+    MAX_RETRY_DELAY = 120
+
+    def __init__(self, client, developer: str, leaderboard: str, scores: ScoreQueue):
+        super(LeaderboardService, self).__init__(daemon=True)
+        self.client = client
+        self.developer = developer
+        self.leaderboard = leaderboard
+        self.requests: Queue[tuple] = Queue()
+        self.refresh_pending = False
+
+        self.scores = scores
+        self.retry_delay = 0
+        self.next_upload = 0
+
+        self.leader_board: LeaderboardIndex | None = None
+        self.loaded = False
+        self.version = 0
+
+    def refresh(self):
+        if not self.refresh_pending:
+            self.refresh_pending = True
+            self.requests.put(("refresh",))
+
+    def post_score(self, name: str, score: int):
+        self.requests.put(("post", name, score))
+
+    def run(self) -> None:
+        self.client.connect(self.developer, self.leaderboard)
+        while True:
+            # waits for a request, or until the pending scores can be tried again
+            timeout = max(0, self.next_upload - monotonic()) if self.scores else None
+            try:
+                request = self.requests.get(timeout=timeout)
+            except Empty:
+                request = ("upload",)
+            try:
+                if request[0] == "post":
+                    self.scores.add(request[1], request[2])
+                uploaded = bool(self.scores) and monotonic() >= self.next_upload and self.upload()
+                if request[0] == "refresh" or uploaded:
+                    self.refresh_pending = False
+                    self.fetch()
+            except Exception as e:
+                # (an error of the pending scores file for instance) waits like a failed upload, instead of trying
+                # again right away
+                print(f"Leaderboard request {request[0]} failed: {e}")
+                self.delay_upload()
+
+    def upload(self) -> bool:
+        # True if at least one score has been uploaded
+        uploaded = False
+        for name, score in self.scores.get_best().items():
+            try:
+                response = self.client.post_score(name=name, score=score)
+            except Exception as e:
+                print(f"Upload of the score of {name} failed: {e}")
+                response = None
+            # scoreunlocked gives None when the request failed, but also the text of the page or the error it received
+            # when the server failed : only a dict without error means that the score has been saved
+            if not isinstance(response, dict) or response.get("error"):
+                if response is not None:
+                    print(f"Upload of the score of {name} failed: {response}")
+                self.delay_upload()
+                return uploaded
+            self.scores.remove(name, score)
+            uploaded = True
+            # shown right away, the leaderboard downloaded after the upload replaces it
+            if self.leader_board is not None:
+                leader_board = self.leader_board.copy()
+                leader_board.add(name, score)
+                self.leader_board = leader_board
+                self.version += 1
+        self.retry_delay = 0
+        return uploaded
+
+    def delay_upload(self):
+        self.retry_delay = min(self.retry_delay * 2 or self.RETRY_DELAY, self.MAX_RETRY_DELAY)
+        self.next_upload = monotonic() + self.retry_delay
+
+    def fetch(self):
+        ldb = self.client.get_leaderboard()
+        # without an answer (timeout, no network...), the last leaderboard received is kept
+        if isinstance(ldb, list):
+            self.leader_board = LeaderboardIndex(ldb)
+        self.loaded = True
+        self.version += 1
@@ -1,9 +1,11 @@
 import pygame as pg
+from bisect import bisect_left, insort
 from copy import copy
+import numpy as np
 from math import floor
-from random import choice, randint
-from .dimensions import NormalDimension, MoonDimension, NeonDimension
-from .objects import StaticObject, vec, Object2d, Monster, Canon
+from random import Random, randint
+from .dimensions import NormalDimension, MoonDimension, NeonDimension, Tile, tile_array
+from .objects import StaticObject, vec, Object2d, Monster, Canon, game_clock
 
 
 def darker(color: tuple[int, ...] | pg.Color, degree: int) -> pg.Color:
@@ -31,57 +33,70 @@ class TileSprite(StaticObject):
         "grass": {"default": pg.Color(124, 94, 66), "top": pg.Color(0, 200, 50)},
         "moon_sand": {"default": pg.Color(150, 150, 150), "top": pg.Color(125, 140, 130)}
     }
+    # (tag, size, color, style) -> surface and mask shared by every tile looking the same (see get_sprite)
+    sprites: dict[tuple[str, tuple[int, int], tuple[int, ...], str], tuple[pg.Surface, pg.mask.Mask]] = {}
 
     def __init__(self, pos: vec, size: vec, tag: str, color=pg.Color(255, 0, 0),
                  unbreakable=False):
-        super(TileSprite, self).__init__(pos, pg.Surface(size, pg.SRCALPHA))
+        style = "neon" if "neon" in tag else "normal"
+        surface, mask = self.get_sprite(tag, size, color, style)
+        super(TileSprite, self).__init__(pos, surface, share_surface=True)
         self.unbreakable = unbreakable
 
         # SPRITE ANIMATION ------------------------------
         self.color = color
         self.tag = tag
-        self.style = "neon" if "neon" in tag else "normal"
+        self.style = style
         if tag in self.special_color_set:
             self.color = self.special_color_set[tag]["default"]
             for key, item in self.special_color_set[tag].items():
                 if key in self.colors:
                     self.colors[key] = item
-            self.surface.fill(self.color)
         elif tag == "beacon":
-            self.surface.fill(self.color)
-            self.color = color
+            # the beacons draw on their surface when they are pressed, so they don't share it
+            self.surface = self.surface.copy()
             self.pressed = False
             self.button_rect = pg.Rect(self.rect.x, self.rect.y - 50, self.rect.w, 50)
         elif "spike" in self.tag:
             self.tag = "spike"
             self.DONT_COLLIDE = True
-            self.surface = pg.Surface(size, pg.SRCALPHA)
-            pg.draw.polygon(self.surface, self.color, ((0, self.surface.get_height()),
-                                                       (self.surface.get_width(), self.surface.get_height()),
-                                                       (self.surface.get_width() / 2,
-                                                        self.surface.get_height() * 0.13)))
-        elif tag == "color":
-            self.surface.fill(self.color)
-
-        if self.style == "neon":
-            if self.tag != "spike":
-                self.surface.set_alpha(0)
-            else:
-                pg.draw.polygon(self.surface, self.color, ((0, self.surface.get_height()),
-                                                          (self.surface.get_width(), self.surface.get_height()),
-                                                          (self.surface.get_width() / 2,
-                                                           self.surface.get_height() * 0.13)))
-            self.color = color
 
         self.dying = False
         self.death_time = 0
-
-        self.mask = pg.mask.from_surface(self.surface)
+        # (chunk, row, col) of the tile in the map, set by Map.translate_chunk
+        self.map_index: tuple[tuple[int, int] | str, int, int] | None = None
+
+        self.mask = mask
+
+    @classmethod
+    def get_sprite(cls, tag: str, size: vec, color, style: str) -> tuple[pg.Surface, pg.mask.Mask]:
+        # the tiles never draw on their surface (apart from the beacons), so the tiles looking the same share it
+        key = tag, (int(size[0]), int(size[1])), tuple(color), style
+        if key not in cls.sprites:
+            surface = cls.make_surface(tag, key[1], color, style)
+            cls.sprites[key] = surface, pg.mask.from_surface(surface)
+        return cls.sprites[key]
+
+    @classmethod
+    def make_surface(cls, tag: str, size: tuple[int, int], color, style: str) -> pg.Surface:
+        if "spike" in tag:
+            surface = pg.Surface(size, pg.SRCALPHA)
+            pg.draw.polygon(surface, color, ((0, size[1]), (size[0], size[1]), (size[0] / 2, size[1] * 0.13)))
+            return surface
+
+        surface = pg.Surface(size)
+        if tag in cls.special_color_set:
+            surface.fill(cls.special_color_set[tag]["default"])
+        elif tag in ("beacon", "color"):
+            surface.fill(color)
+        if style == "neon":
+            surface.set_alpha(0)
+        return surface
 
     def kill(self):
         if not self.dying:
             self.dying = True
-            self.death_time = pg.time.get_ticks()
+            self.death_time = game_clock.get_ticks()
             
     def update(self) -> None | str:
         if self.tag == "beacon":
@@ -92,7 +107,7 @@ class TileSprite(StaticObject):
                 self.surface.fill(self.color)
 
         if self.dying:
-            if pg.time.get_ticks() - self.death_time > 500:
+            if game_clock.get_ticks() - self.death_time > 500:
                 return "kill"
 
         return super().update()
@@ -100,13 +115,15 @@ class TileSprite(StaticObject):
 
 class Map:
 
-    ignore_neighbour = [0, 4, "monster", 13, "moon_spike"]
-    g = 10
-    s = 11
-    b = 12
-    m = "monster"
-    c = 13
-    S = "moon_sand"
+    ignore_neighbour = frozenset({Tile.EMPTY, Tile.SPIKE, Tile.MONSTER, Tile.CANON, Tile.MOON_SPIKE})
+    # bit of each direction in the neighbour masks of the tiles
+    neighbour_bits = {'left': 1, 'right': 2, 'top': 4, 'bottom': 8}
+    g = Tile.GRASS
+    s = Tile.STONE
+    b = Tile.BEACON
+    m = Tile.MONSTER
+    c = Tile.CANON
+    S = Tile.MOON_SAND
 
     menu_map = [[0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
                 [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
@@ -130,11 +147,14 @@ class Map:
                     [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
                     [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
                     [g, g, g, g, g, g, g, g, g, g, g, g, g, g, g, g, g, g, g, g, g, g, g, g, g, g, g, g, g, g, g, g]]
+    menu_map, menu_map_gen = tile_array(menu_map), tile_array(menu_map_gen)
     dimensions = {
         "normal": NormalDimension,
         "moon": MoonDimension,
         "neon": NeonDimension
     }
+    # (dimension, preset) -> tile array of the preset, made once for all the chunks using it
+    preset_arrays: dict[tuple[str, str], np.ndarray] = {}
 
     def __init__(self, app):
 
@@ -142,39 +162,62 @@ class Map:
         self.horizontal_only = True
         self.vertical_only = False
         self.app = app
+        # the presets are chosen with their own generator, so that a seed gives the same sequence of presets whatever
+        # else uses the random module (see seed)
+        self.random = Random()
         self.tile_size = vec(50, 50)
         self.chunk_size = vec(15, 11)
 
         self.translate = {
-            4: (lambda map_, x, y: TileSprite(vec(x, y), map_.tile_size, "spike")),
-            3: (lambda map_, x, y: TileSprite(vec(x, y), map_.tile_size, "color")),
-            10: (lambda map_, x, y: TileSprite(vec(x, y), map_.tile_size, "grass")),
-            11: (lambda map_, x, y: TileSprite(vec(x, y), map_.tile_size, "stone")),
-            12: (lambda map_, x, y: TileSprite(vec(x, y), map_.tile_size, "beacon", color=pg.Color(150, 150, 0))),
-            13: (lambda map_, x, y: Canon(map_.app, vec(x, y))),
-            "moon_sand": (lambda map_, x, y: TileSprite(vec(x, y), map_.tile_size, "moon_sand",
+            Tile.SPIKE: (lambda map_, x, y: TileSprite(vec(x, y), map_.tile_size, "spike")),
+            Tile.COLOR: (lambda map_, x, y: TileSprite(vec(x, y), map_.tile_size, "color")),
+            Tile.GRASS: (lambda map_, x, y: TileSprite(vec(x, y), map_.tile_size, "grass")),
+            Tile.STONE: (lambda map_, x, y: TileSprite(vec(x, y), map_.tile_size, "stone")),
+            Tile.BEACON: (lambda map_, x, y: TileSprite(vec(x, y), map_.tile_size, "beacon",
+                                                       color=pg.Color(150, 150, 0))),
+            Tile.CANON: (lambda map_, x, y: Canon(map_.app, vec(x, y))),
+            Tile.MOON_SAND: (lambda map_, x, y: TileSprite(vec(x, y), map_.tile_size, "moon_sand",
                                                         color=pg.Color(150, 150, 150))),
-            "neon_block": (lambda map_, x, y: TileSprite(vec(x, y), map_.tile_size, "neon",
+            Tile.NEON_BLOCK: (lambda map_, x, y: TileSprite(vec(x, y), map_.tile_size, "neon",
                                                          color=pg.Color(255, 182, 193))),
-            "neon_spike": (lambda map_, x, y: TileSprite(vec(x, y), map_.tile_size, "neon_spike",
+            Tile.NEON_SPIKE: (lambda map_, x, y: TileSprite(vec(x, y), map_.tile_size, "neon_spike",
                                                          color=pg.Color(0, 0, 0))),
-            "moon_spike": (lambda map_, x, y: TileSprite(vec(x, y), map_.tile_size, "moon_spike",
+            Tile.MOON_SPIKE: (lambda map_, x, y: TileSprite(vec(x, y), map_.tile_size, "moon_spike",
                                                          color=pg.Color(125, 100, 125)))
         }
 
-        self.chunks: dict[tuple[int, int], list[list[int, ...]], ...] = {
-            (0, 0): copy(self.dimensions["normal"].empty_preset),
-            "menu": copy(self.menu_map)
+        # the tile matrices of the chunks, shared with their preset until one of their tiles dies (see remove_tile)
+        self.chunks: dict[tuple[int, int] | str, np.ndarray] = {
+            (0, 0): self.get_preset("normal", "empty_preset"),
+            "menu": self.menu_map
         }
         self.presets: dict[tuple[int, int], str] = {
             (0, 0): "empty_preset"
         }
         self.generated_chunks = {}
+        # chunk -> neighbour mask of each cell, kept up to date when the chunks around appear and when tiles die
+        self.neighbour_masks: dict[tuple[int, int] | str, list[list[int]]] = {}
         self.menu = False
         self.n_chunks = 0
         self.n_chunk_before_switch = 5
         self.dimension = "normal"
-        self.transitions = {}
+        # chunk -> name of the transition preset generated in it
+        self.transitions: dict[tuple[int, int], str] = {}
+        # chunks of the transitions, sorted by x, to find the last transition before a chunk with a bisection
+        self.transition_index: list[tuple[int, int]] = []
+        # chunk -> environment of the chunk, emptied when the transitions change
+        self.environments: dict[tuple[int, int], str] = {}
+
+        # in horizontal mode, the objects of the chunks more than chunk_keep_radius chunks away from the player are
+        # unloaded (their tiles are kept, to make them again when the player comes back)
+        self.chunk_keep_radius = 2
+        # first and last x of the chunks kept loaded
+        self.loaded_chunks: tuple[int, int] | None = None
+
+    def get_preset(self, dimension: str, preset: str) -> np.ndarray:
+        if (dimension, preset) not in self.preset_arrays:
+            self.preset_arrays[(dimension, preset)] = tile_array(getattr(self.dimensions[dimension], preset))
+        return self.preset_arrays[(dimension, preset)]
 
     @staticmethod
     def collide_spike_player(player, spike: TileSprite):
@@ -186,13 +229,16 @@ class Map:
 
     def generate_menu(self):
         self.chunks = {
-            "menu": copy(self.menu_map),
-            (0, 0): copy(self.dimensions["normal"].empty_preset)
+            "menu": self.menu_map,
+            (0, 0): self.get_preset("normal", "empty_preset")
         }
         self.presets: dict[tuple[int, int], str] = {
             (0, 0): "empty_preset"
         }
         self.generated_chunks = {}
+        self.neighbour_masks = {}
+        self.clear_transitions()
+        self.loaded_chunks = None
 
         self.n_chunks = 0
         self.menu = True
@@ -201,13 +247,16 @@ class Map:
 
     def quit_menu(self):
         self.chunks = {
-            "menu": copy(self.menu_map),
-            (0, 0): copy(self.dimensions["normal"].empty_preset)
+            "menu": self.menu_map,
+            (0, 0): self.get_preset("normal", "empty_preset")
         }
         self.presets: dict[tuple[int, int], str] = {
             (0, 0): "empty_preset"
         }
         self.generated_chunks = {}
+        self.neighbour_masks = {}
+        self.clear_transitions()
+        self.loaded_chunks = None
         self.menu = False
         self.chunk_size = vec(34, 15)
         self.dimension = "normal"
@@ -224,20 +273,28 @@ class Map:
         return (floor(pos.x / (self.chunk_size.x * self.tile_size.x)),
                 floor(pos.y / (self.chunk_size.y * self.tile_size.y)))
 
+    def seed(self, seed: int | None):
+        self.random.seed(seed)
+
     def init_game(self):
         # self.generate_new_chunk((0, 0))
         pass
 
     def has_neighbour(self, direction: str, obj):
+        # the tiles read their neighbour mask, the other objects look at the map around them
+        if (index := getattr(obj, "map_index", None)) is not None and index[0] in self.neighbour_masks:
+            return bool(self.neighbour_masks[index[0]][index[1]][index[2]] & self.neighbour_bits[direction])
+        return self.look_for_neighbour(direction, *self.get_index_from_co(vec(obj.rect.topleft)))
+
+    def look_for_neighbour(self, direction: str, row: int, col: int, chunk_id_x: int, chunk_id_y: int):
 
         translate = {'left': (0, -1), 'right': (0, 1), 'top': (-1, 0), 'bottom': (1, 0)}
-        row, col, chunk_id_x, chunk_id_y = self.get_index_from_co(vec(obj.rect.topleft))
 
         if self.menu:
             row += translate[direction][0]
             col += translate[direction][1]
             if 0 <= row < len(self.menu_map) and 0 <= col < len(self.menu_map[1]):
-                return self.menu_map[row][col] not in self.ignore_neighbour
+                return self.menu_map[row, col] not in self.ignore_neighbour
             else:
                 return False if row != len(self.menu_map)-1 else True
         else:
@@ -248,27 +305,64 @@ class Map:
             if self.horizontal_only:
                 return False
             if (new_id := (chunk_id_x, chunk_id_y - 1)) in self.chunks:
-                return self.chunks[new_id][int(self.chunk_size.y-1)][col] not in self.ignore_neighbour
+                return self.chunks[new_id][int(self.chunk_size.y-1), col] not in self.ignore_neighbour
         elif row == self.chunk_size.y - 1 and direction == "bottom":
             if self.horizontal_only:
                 return False
             if (new_id := (chunk_id_x, chunk_id_y + 1)) in self.chunks:
-                return self.chunks[new_id][0][col] not in self.ignore_neighbour
+                return self.chunks[new_id][0, col] not in self.ignore_neighbour
         elif col == 0 and direction == "left":
             if self.vertical_only:
                 return False
             if (new_id := (chunk_id_x - 1, chunk_id_y)) in self.chunks:
-                return self.chunks[new_id][row][int(self.chunk_size.x - 1)] not in self.ignore_neighbour
+                return self.chunks[new_id][row, int(self.chunk_size.x - 1)] not in self.ignore_neighbour
         elif col == self.chunk_size.x - 1 and direction == "right":
             if self.vertical_only:
                 return False
             if (new_id := (chunk_id_x + 1, chunk_id_y)) in self.chunks:
-                return self.chunks[new_id][row][0]  not in self.ignore_neighbour
+                return self.chunks[new_id][row, 0] not in self.ignore_neighbour
 
         if 0 <= row + translate[direction][0] < self.chunk_size.y and 0 <= col + translate[direction][1] < self.chunk_size.x:
             row += translate[direction][0]
             col += translate[direction][1]
-            return self.chunks[(chunk_id_x, chunk_id_y)][row][col] not in self.ignore_neighbour
+            return self.chunks[(chunk_id_x, chunk_id_y)][row, col] not in self.ignore_neighbour
+
+    def get_neighbour_mask(self, row: int, col: int, chunk_id_x: int, chunk_id_y: int) -> int:
+        mask = 0
+        for direction, bit in self.neighbour_bits.items():
+            if self.look_for_neighbour(direction, row, col, chunk_id_x, chunk_id_y):
+                mask |= bit
+        return mask
+
+    def update_neighbour_masks(self, key: tuple[int, int] | str, cells):
+        # computes again the mask of the given (row, col) cells of the chunk (only the ones with a tile)
+        masks, matrix = self.neighbour_masks[key], self.chunks[key]
+        chunk_id = (0, 0) if key == "menu" else key
+        for row, col in cells:
+            masks[row][col] = self.get_neighbour_mask(row, col, *chunk_id) if matrix[row, col] != Tile.EMPTY else 0
+
+    def update_borders(self, id_: tuple[int, int]):
+        # the border of the chunks around the given one depends on it (it just appeared or it has been unloaded)
+        rows, cols = int(self.chunk_size.y), int(self.chunk_size.x)
+        for key, cells in (((id_[0] - 1, id_[1]), [(row, cols - 1) for row in range(rows)]),
+                           ((id_[0] + 1, id_[1]), [(row, 0) for row in range(rows)]),
+                           ((id_[0], id_[1] - 1), [(rows - 1, col) for col in range(cols)]),
+                           ((id_[0], id_[1] + 1), [(0, col) for col in range(cols)])):
+            if key in self.neighbour_masks and key in self.chunks:
+                self.update_neighbour_masks(key, cells)
+
+    def remove_tile(self, pos: vec):
+        # empties the cell of a dead tile so that it isn't generated again, its neighbours lost a neighbour
+        row, col, chunk_id_x, chunk_id_y = self.get_index_from_co(pos)
+        if not self.chunks[(chunk_id_x, chunk_id_y)].flags.writeable:
+            # the chunk still shares the array of its preset
+            self.chunks[(chunk_id_x, chunk_id_y)] = self.chunks[(chunk_id_x, chunk_id_y)].copy()
+        self.chunks[(chunk_id_x, chunk_id_y)][row, col] = Tile.EMPTY
+        for offset in ((0, 0), (-1, 0), (1, 0), (0, -1), (0, 1)):
+            row, col, chunk_id_x, chunk_id_y = self.get_index_from_co(
+                pos + vec(offset[0] * self.tile_size.x, offset[1] * self.tile_size.y))
+            if (key := self.get_chunk_key(chunk_id_x, chunk_id_y)) in self.neighbour_masks and key in self.chunks:
+                self.update_neighbour_masks(key, [(row, col)])
 
     def translate_chunk(self, id_: tuple[int, int], special_key: str = None) -> list[Object2d]:
         chunk_w, chunk_h = self.chunk_size.x * self.tile_size.x, self.chunk_size.y * self.tile_size.y
@@ -276,34 +370,87 @@ class Map:
         matrix = self.chunks[id_]
         if special_key == "menu":
             id_ = 0, 0
-        for r, row in enumerate(matrix):
-            for c, col in enumerate(row):
-                if col == "monster":
-                    self.app.game.add_object(
-                        Monster(self.app, (id_[0] * chunk_w + c * self.tile_size.x,
-                                           id_[1] * chunk_h + r * self.tile_size.y), self.tile_size)
-                    )
-                elif col != 0:
-                    translated.append(
-                        self.translate[col](self,
-                                            id_[0] * chunk_w + c * self.tile_size.x,
-                                            id_[1] * chunk_h + r * self.tile_size.y)
-                    )
+        # only the cells that are not empty, in the order of the rows
+        rows, cols = np.nonzero(matrix)
+        cells = list(zip(rows.tolist(), cols.tolist()))
+        for (r, c), tile in zip(cells, matrix[rows, cols].tolist()):
+            if tile == Tile.MONSTER:
+                self.app.game.add_object(
+                    Monster(self.app, (id_[0] * chunk_w + c * self.tile_size.x,
+                                       id_[1] * chunk_h + r * self.tile_size.y), self.tile_size)
+                )
+            else:
+                translated.append(
+                    self.translate[tile](self,
+                                         id_[0] * chunk_w + c * self.tile_size.x,
+                                         id_[1] * chunk_h + r * self.tile_size.y)
+                )
+                if isinstance(translated[-1], TileSprite):
+                    translated[-1].map_index = (special_key or id_, r, c)
+        key = special_key or id_
+        self.neighbour_masks[key] = [[0] * matrix.shape[1] for _ in range(matrix.shape[0])]
+        self.update_neighbour_masks(key, cells)
         return translated
 
     def get_current_chunk(self, pos: vec):
         return (floor(pos.x / (self.chunk_size.x * self.tile_size.x)),
                 floor(pos.y / (self.chunk_size.y * self.tile_size.y)))
 
-    def get_current_chunk_objects(self, chunk_id_x: int, chunk_id_y: int) -> (list[Object2d], bool):
+    def get_chunk_key(self, chunk_id_x: int, chunk_id_y: int) -> tuple[int, int] | str:
+        # key of the chunk in generated_chunks (in the menu, the chunk (0, 0) is the menu)
         if self.menu and chunk_id_x == 0 and chunk_id_y == 0:
+            return "menu"
+        return chunk_id_x, chunk_id_y
+
+    def get_current_chunk_objects(self, chunk_id_x: int, chunk_id_y: int) -> (list[Object2d], bool):
+        if (id_ := self.get_chunk_key(chunk_id_x, chunk_id_y)) == "menu":
             return self.generated_chunks["menu"], False
 
-        if (id_ := (chunk_id_x, chunk_id_y)) in self.generated_chunks:
+        if id_ in self.generated_chunks:
             return self.generated_chunks[id_], False
+        elif id_ in self.chunks:
+            return self.reload_chunk(id_), True
         else:
             return self.generate_new_chunk(id_), True
 
+    def reload_chunk(self, id_: tuple[int, int]) -> list[Object2d]:
+        # objects of a chunk whose tiles are known, but not its objects (the first chunk of the game, or a chunk
+        # unloaded), made from its tiles (without the tiles that died)
+        output = self.generated_chunks[id_] = self.translate_chunk(id_)
+        return output
+
+    def is_loaded(self, chunk_id_x: int) -> bool:
+        return self.loaded_chunks is None or self.loaded_chunks[0] <= chunk_id_x <= self.loaded_chunks[1]
+
+    def unload_chunks(self, current_chunk: tuple[int, int]) -> bool:
+        # forgets the objects of the chunks too far from the current one, returns True if the chunks kept loaded have
+        # changed (the objects of the others have to be removed from the game, see Game.unload_chunks). The tiles,
+        # presets and transitions of the chunks are kept (the tiles are shared with their preset, unless some died) :
+        # reload_chunk makes the objects again when the player comes back
+        if self.menu or not self.horizontal_only:
+            return False
+        loaded_chunks = (current_chunk[0] - self.chunk_keep_radius, current_chunk[0] + self.chunk_keep_radius)
+        if loaded_chunks == self.loaded_chunks:
+            return False
+        self.loaded_chunks = loaded_chunks
+
+        for chunks in (self.generated_chunks, self.neighbour_masks):
+            for id_ in [id_ for id_ in chunks if isinstance(id_, tuple) and not self.is_loaded(id_[0])]:
+                del chunks[id_]
+        self.environments = {}
+        return True
+
+    def clear_transitions(self):
+        self.transitions = {}
+        self.transition_index = []
+        self.environments = {}
+
+    def add_transition(self, id_: tuple[int, int], transition: str):
+        if id_ not in self.transitions:
+            insort(self.transition_index, id_, key=lambda chunk: chunk[0])
+        self.transitions[id_] = transition
+        self.environments = {}
+
     def get_transition(self, player):
         pos = vec(player.rect.topleft)
         chk = self.get_current_chunk(pos)
@@ -313,17 +460,19 @@ class Map:
             return "none", 0.0
 
     def get_environment(self, player):
-        def after(transition_name):
-            return transition_name.split("_")[-1]
-
-        if self.get_transition(player)[0] == "none":
-            chk1 = self.get_chunk(vec(player.rect.topleft))
-            for chk2, transition in reversed(self.transitions.items()):
-                if chk1[0] > chk2[0]:
-                    return after(transition)
+        chk = self.get_current_chunk(vec(player.rect.topleft))
+        if chk not in self.environments:
+            self.environments[chk] = self.get_chunk_environment(chk)
+        return self.environments[chk]
+
+    def get_chunk_environment(self, chk: tuple[int, int]) -> str:
+        # the transition of the chunk, or the dimension the last transition before the chunk goes to
+        if chk in self.transitions:
+            return self.transitions[chk]
+        i = bisect_left(self.transition_index, chk[0], key=lambda chunk: chunk[0])
+        if i == 0:
             return "normal"
-        else:
-            return self.get_transition(player)[0]
+        return self.transitions[self.transition_index[i - 1]].split("_")[-1]
 
     def generate_new_chunk(self, id_) -> list[Object2d]:
 
@@ -351,20 +500,23 @@ class Map:
                         self.dimension = "normal"
                 chosen_preset = self.dimensions[last_dim].transition_to[self.dimension]
 
-            if id_ not in self.chunks:
+            new_chunk = id_ not in self.chunks
+            if new_chunk:
                 self.n_chunks += 1
                 if self.menu:
-                    self.chunks[id_] = copy(self.menu_map_gen)
+                    self.chunks[id_] = self.menu_map_gen
                 else:
                     dimension = self.dimensions[last_dim]
                     if self.horizontal_only:
                         last_preset = self.presets.get((id_[0]-1, id_[1]))
                         if chosen_preset is None:
-                            chosen_preset = choice(dimension.following[last_preset])
+                            chosen_preset = self.random.choice(dimension.following[last_preset])
                         else:
-                            self.transitions[id_] = chosen_preset
-                        self.chunks[id_] = getattr(dimension, chosen_preset)
+                            self.add_transition(id_, chosen_preset)
+                        self.chunks[id_] = self.get_preset(last_dim, chosen_preset)
                         self.presets[id_] = chosen_preset
             output = self.translate_chunk(id_)
+            if new_chunk:
+                self.update_borders(id_)
         self.generated_chunks[id_] = output
         return output
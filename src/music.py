@@ -0,0 +1,160 @@
+import pygame as pg
+from io import BytesIO
+from queue import Queue
+from threading import Thread, Lock
+
+
+class MusicController:
+
+    """
+    Plays the musics of the game without loading anything in the frame loop, and without decoding whole tracks.
+
+    The tracks are streamed with pg.mixer.music. To crossfade between them, a thread of their own decodes a lead-in of
+    each one (its first LEAD_IN_MS, a few hundred KB) into a pg.mixer.Sound : prefetch asks for the lead-ins of the next
+    tracks ahead of time, and play starts a track right away if its lead-in has been decoded, or as soon as it is
+    (update, called every frame, starts it). The lead-in starts at full volume on one of the two channels reserved for
+    the music, while the track playing fades out. Once it has faded out, the thread opens the new track with
+    pg.mixer.music and streams it from where the lead-in is, while the lead-in fades out (in HANDOFF_MS). Only the
+    lead-ins of the tracks playing or about to, the prefetched ones and the pinned ones are kept in memory.
+    """
+
+    CROSSFADE_MS = 1000
+    HANDOFF_MS = 100
+    # longer than the crossfade, the stream has to be opened before the end of the lead-in
+    LEAD_IN_MS = 3000
+    LEAD_IN_BYTES = 64 * 1024
+
+    def __init__(self, folder: str, pinned: tuple[str, ...] = ()):
+        self.folder = folder
+        self.pinned = set(pinned)
+        self.prefetched: set[str] = set()
+        # decoded lead-ins, and tracks given to the loader (decoded or not), shared with the loader thread
+        self.lock = Lock()
+        self.leads: dict[str, pg.mixer.Sound] = {}
+        self.requested: set[str] = set()
+        self.to_load: Queue[tuple] = Queue()
+        Thread(target=self.load_tracks, daemon=True).start()
+
+        pg.mixer.set_reserved(2)
+        self.channels = pg.mixer.Channel(0), pg.mixer.Channel(1)
+        # channel of the lead-in of the current track
+        self.channel = 0
+        self.current: str | None = None
+        self.volume = 1
+        # increases each time a track starts or the music stops, a stream opened for an older track isn't played
+        self.generation = 0
+        # track waiting for its lead-in, with the duration of its fade
+        self.next: tuple[str, int] | None = None
+        # ticks at which the stream of the current track can start, with the ticks at which its lead-in started
+        self.handoff: tuple[int, int] | None = None
+
+    def load_tracks(self):
+        while True:
+            request = self.to_load.get()
+            try:
+                if request[0] == "lead":
+                    self.load_lead(request[1])
+                else:
+                    self.start_stream(*request[1:])
+            except (pg.error, OSError) as e:
+                print(f"The music {request[1]} couldn't be loaded: {e}")
+
+    def load_lead(self, name: str):
+        # decodes the beginning of the file, twice as long each time until it lasts LEAD_IN_MS (or is the whole file)
+        size = self.LEAD_IN_BYTES
+        while True:
+            with open(self.folder + name, "rb") as file:
+                data = file.read(size)
+            lead = pg.mixer.Sound(file=BytesIO(data))
+            if lead.get_length() * 1000 >= self.LEAD_IN_MS or len(data) < size:
+                break
+            size *= 2
+        with self.lock:
+            # forgotten while it was decoded
+            if name in self.requested:
+                self.leads[name] = lead
+
+    def start_stream(self, name: str, generation: int, channel: int, lead_start: int):
+        if generation != self.generation:
+            return
+        pg.mixer.music.load(self.folder + name)
+        with self.lock:
+            if generation != self.generation:
+                return
+            pg.mixer.music.set_volume(self.volume)
+            pg.mixer.music.play(start=(pg.time.get_ticks() - lead_start) / 1000, fade_ms=self.HANDOFF_MS)
+            self.channels[channel].fadeout(self.HANDOFF_MS)
+
+    def request(self, name: str):
+        with self.lock:
+            if name in self.requested:
+                return
+            self.requested.add(name)
+        self.to_load.put(("lead", name))
+
+    def prefetch(self, *names: str):
+        self.prefetched = set(names)
+        for name in names:
+            self.request(name)
+
+    def play(self, name: str, fade_ms: int = CROSSFADE_MS):
+        if self.next is not None and self.next[0] == name:
+            return
+        self.next = (name, fade_ms)
+        self.request(name)
+        self.update()
+
+    def update(self):
+        if self.handoff is not None and pg.time.get_ticks() >= self.handoff[0]:
+            self.to_load.put(("stream", self.current, self.generation, self.channel, self.handoff[1]))
+            self.handoff = None
+
+        if self.next is None or (lead := self.leads.get(self.next[0])) is None:
+            return
+        name, fade_ms = self.next
+        self.next = None
+        with self.lock:
+            self.generation += 1
+            if fade_ms:
+                pg.mixer.music.fadeout(fade_ms)
+                self.channels[self.channel].fadeout(fade_ms)
+            else:
+                pg.mixer.music.stop()
+                self.channels[self.channel].stop()
+        self.channel = 1 - self.channel
+        self.volume = 1
+        self.channels[self.channel].set_volume(1)
+        self.channels[self.channel].play(lead, fade_ms=fade_ms)
+        now = pg.time.get_ticks()
+        self.handoff = (now + fade_ms, now)
+        self.current = name
+        self.forget()
+
+    def forget(self):
+        # the channels keep the lead-ins they play, even when they're forgotten here
+        keep = self.pinned | self.prefetched | {self.current}
+        with self.lock:
+            for name in list(self.requested):
+                if name not in keep:
+                    self.leads.pop(name, None)
+                    self.requested.discard(name)
+
+    def set_volume(self, volume: float):
+        self.volume = volume
+        with self.lock:
+            pg.mixer.music.set_volume(volume)
+            self.channels[self.channel].set_volume(volume)
+
+    def get_busy(self) -> bool:
+        return (self.next is not None or self.handoff is not None or pg.mixer.music.get_busy()
+                or self.channels[self.channel].get_busy())
+
+    def stop(self):
+        self.next = None
+        self.current = None
+        self.handoff = None
+        with self.lock:
+            self.generation += 1
+            pg.mixer.music.stop()
+            for channel in self.channels:
+                channel.stop()
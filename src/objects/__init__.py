@@ -1,4 +1,8 @@
 from .object2d import Object2d, vec
+from .clock import game_clock
+from .inputs import key_state
+from .text_cache import text_cache
+from .assets import assets
 from .dyn_and_stat_objects import DynamicObject, StaticObject
 from .auto_and_user_objects import UserObject, AutonomousObject
 from .player import Player
@@ -0,0 +1,61 @@
+import os
+import pygame as pg
+
+
+class AssetManager:
+
+    """
+    Fonts, sounds and images of the game, loaded from the disk once and then shared.
+
+    The fonts are kept by (path, size), the sounds by path and the images by (path, alpha) (converted for the display,
+    with convert_alpha if alpha). The surfaces and sounds are shared by everything that asks for them : a surface has to
+    be copied before being modified, and the volume of a sound is the same for all its users.
+    preload loads assets before they are needed (the LoadingThread preloads what the game loads later, e.g. on death),
+    and get_memory_usage tells roughly how much memory the loaded assets take.
+    """
+
+    def __init__(self):
+        self.fonts: dict[tuple[str, int], pg.font.Font] = {}
+        self.sounds: dict[str, pg.mixer.Sound] = {}
+        self.images: dict[tuple[str, bool], pg.Surface] = {}
+
+    def font(self, path: str, size: int) -> pg.font.Font:
+        if (font := self.fonts.get((path, size))) is None:
+            font = self.fonts[(path, size)] = pg.font.Font(path, size)
+        return font
+
+    def sound(self, path: str) -> pg.mixer.Sound:
+        if (sound := self.sounds.get(path)) is None:
+            sound = self.sounds[path] = pg.mixer.Sound(path)
+        return sound
+
+    def image(self, path: str, alpha: bool = False) -> pg.Surface:
+        if (image := self.images.get((path, alpha))) is None:
+            # converted from the other version of the image if it is already loaded
+            image = self.images.get((path, not alpha)) or pg.image.load(path)
+            image = self.images[(path, alpha)] = image.convert_alpha() if alpha else image.convert()
+        return image
+
+    def preload(self, fonts: list[tuple[str, int]] = (), sounds: list[str] = (), images: list[tuple[str, bool]] = ()):
+        for path, size in fonts:
+            self.font(path, size)
+        for path in sounds:
+            self.sound(path)
+        for path, alpha in images:
+            self.image(path, alpha)
+
+    def get_memory_usage(self) -> dict[str, int]:
+        # in bytes : pixels of the images, samples of the sounds and size of the font files
+        return {
+            "fonts": sum(os.path.getsize(path) for path in {path for path, _ in self.fonts}),
+            "sounds": sum(len(sound.get_raw()) for sound in self.sounds.values()),
+            "images": sum(image.get_width() * image.get_height() * image.get_bytesize() for image in self.images.values())
+        }
+
+    def clear(self):
+        self.fonts.clear()
+        self.sounds.clear()
+        self.images.clear()
+
+
+assets = AssetManager()
@@ -2,6 +2,7 @@ import pygame as pg
 from typing import Any
 
 from .dyn_and_stat_objects import DynamicObject
+from .inputs import key_state
 
 
 class AutonomousObject(DynamicObject):
@@ -54,13 +55,18 @@ class UserObject(DynamicObject):
         self._binds = []
         self._binds_p = []
 
+    def get_bound_keys(self) -> set[int]:
+        # keys read at each update (the ones of the "key-pressed" and "key" binds)
+        return {bind["key"] for bind in self._binds_p if "key" in bind}
+
     def logic(self):
         pass
 
     def update(self):
+        pressed = key_state.get_pressed()
         pressing = {
-            "key": pg.key.get_pressed(),
-            "mouse": pg.key.get_pressed()
+            "key": pressed,
+            "mouse": pressed
         }
 
         for bind in self._binds_p:
@@ -0,0 +1,24 @@
+class GameClock:
+
+    """
+    Time of the simulation, in milliseconds.
+
+    It only moves forward by fixed steps (see App.run), so every gameplay timer (dash, trails, canons, dying tiles...)
+    has to use it instead of pg.time.get_ticks() : that way, a slow frame doesn't change what happens in the game.
+    The UI animations (buttons, titles...) still run on the real time, but not what a click does (see Button).
+    """
+
+    def __init__(self):
+        self.ticks = 0.0
+
+    def reset(self):
+        self.ticks = 0.0
+
+    def advance(self, dt: float):
+        self.ticks += dt
+
+    def get_ticks(self) -> int:
+        return int(self.ticks)
+
+
+game_clock = GameClock()
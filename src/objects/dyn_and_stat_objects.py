@@ -4,15 +4,29 @@ from .object2d import Object2d, vec
 
 class StaticObject(Object2d):
 
-    def __init__(self, pos, img: pg.Surface):
-        super().__init__(pos, img.get_size())
-        self.surface.blit(img, (0, 0))
+    def __init__(self, pos, img: pg.Surface, share_surface: bool = False):
+        # with share_surface, img becomes the surface of the object (instead of being copied on a new surface)
+        if share_surface:
+            super().__init__(pos, img.get_size(), img)
+        else:
+            super().__init__(pos, img.get_size())
+            self.surface.blit(img, (0, 0))
         # the custom collider is a modifier for the rect, in the collision algorithm
 
         self.custom_collider = [0, 0, 0, 0]
+        # the collision grid this object is registered in (if it's a collider), that has to know when it changes
+        self.collider_registry = None
 
     def set_custom_collider(self, c_c: list[int, int, int, int]):
         self.custom_collider = c_c
+        if self.collider_registry is not None:
+            self.collider_registry.update(self)
+
+    def set_position(self, pos: tuple[int, int]):
+        # static objects are not supposed to move, so move them with this method to keep their collider up to date
+        self.rect.topleft = pos
+        if self.collider_registry is not None:
+            self.collider_registry.update(self)
 
 
 class DynamicObject(StaticObject):
@@ -30,8 +44,7 @@ class DynamicObject(StaticObject):
         self.app = app  # reference to the app instance
 
     def update(self):
-        # apply delta time (framerate independence)
-        self.vel *= 60 / self.app.clock.get_fps()
+        # no delta time to apply : the game is simulated by fixed steps (see App.run)
         self.vel = vec(round(self.vel.x), round(self.vel.y))
         # apply the collision algorithm
         self.app.game.collision_algorithm(self)
@@ -0,0 +1,34 @@
+import pygame as pg
+
+
+class PressedKeys:
+
+    # same interface as what pg.key.get_pressed() returns, for a given set of keys
+    def __init__(self, keys):
+        self.keys = frozenset(keys)
+
+    def __getitem__(self, key: int) -> bool:
+        return key in self.keys
+
+
+class KeyState:
+
+    """
+    Keys pressed, as read by the UserObjects at each step of the simulation.
+
+    By default it's the keyboard (pg.key.get_pressed()). A replay sets the keys pressed at each step instead
+    (see src/replay.py), so that the binds are fed with what has been recorded.
+    """
+
+    def __init__(self):
+        self.pressed: PressedKeys | None = None
+
+    def set_pressed(self, keys):
+        # None -> back to the keyboard
+        self.pressed = PressedKeys(keys) if keys is not None else None
+
+    def get_pressed(self):
+        return pg.key.get_pressed() if self.pressed is None else self.pressed
+
+
+key_state = KeyState()
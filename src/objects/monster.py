@@ -1,6 +1,7 @@
 import pygame as pg
 from .dyn_and_stat_objects import DynamicObject, StaticObject
 from . import vec
+from .clock import game_clock
 
 
 class Monster(DynamicObject):
@@ -57,8 +58,8 @@ class Canon(StaticObject):
         self.last_add = 0
 
     def update(self, *args, **kwargs) -> None:
-        if pg.time.get_ticks() - self.last_add > self.delay:
-            self.last_add = pg.time.get_ticks()
+        if game_clock.get_ticks() - self.last_add > self.delay:
+            self.last_add = game_clock.get_ticks()
             self.app.game.add_object(
                 Bullet(self.app, (self.rect.centerx, self.rect.y-self.bullet_size[1]), self.bullet_size, vec(0, -10),
                        color=(255, 0, 0) if self.app.game.map.get_environment(self) != "moon" else (125, 100, 125))
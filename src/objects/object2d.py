@@ -18,14 +18,16 @@ class Object2d:
     DONT_DRAW = False
     DONT_DRAW_PERSPECTIVE = False
     DONT_COLLIDE = False
+    # given by the ObjectRegistry when the object is added to the game for the first time
+    object_id: int | None = None
 
     """A generic object, containing a surface and a rectangle that can be updated or
     drawn and can handle events.
 
     Made to be inherited by all the in game objects."""
 
-    def __init__(self, pos, size) -> None:
-        self.surface: pg.Surface = pg.Surface(size)
+    def __init__(self, pos, size, surface: pg.Surface | None = None) -> None:
+        self.surface: pg.Surface = surface if surface is not None else pg.Surface(size)
         self.rect: pg.Rect = pg.Rect(pos, size)
         self.colors = {'left': None,
                        'right': None,
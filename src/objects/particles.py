@@ -1,5 +1,6 @@
 import pygame as pg
 from .dyn_and_stat_objects import DynamicObject, vec
+from .clock import game_clock
 
 
 class Particle(DynamicObject):
@@ -14,14 +15,14 @@ class Particle(DynamicObject):
         self.initial_vel = initial_vel
         self.friction = 1
         self.gravity = 1
-        self.initialized_time = pg.time.get_ticks()
+        self.initialized_time = game_clock.get_ticks()
         self.life_span = life_span
 
     def update(self):
         self.vel.x += 1 if self.vel.x < 0 else (-1 if self.vel.x > 0 else 0)
         self.gravity += 1
         self.vel.y += self.gravity
-        if pg.time.get_ticks() - self.initialized_time > self.life_span:
+        if game_clock.get_ticks() - self.initialized_time > self.life_span:
             return "kill"
         return super(Particle, self).update()
 
@@ -2,6 +2,8 @@ import pygame as pg
 
 from .auto_and_user_objects import UserObject
 from .dyn_and_stat_objects import StaticObject
+from .clock import game_clock
+from .assets import assets
 
 vec = pg.math.Vector2
 
@@ -13,13 +15,13 @@ class Trail(StaticObject):
     def __init__(self, pos, size, color, duration):
         super(Trail, self).__init__(pos, pg.Surface(size))
         self.surface.fill(color)
-        self.begin_time = pg.time.get_ticks()
+        self.begin_time = game_clock.get_ticks()
         self.duration = duration
 
     def update(self):
-        if pg.time.get_ticks() - self.begin_time > self.duration:
+        if game_clock.get_ticks() - self.begin_time > self.duration:
             return "kill"
-        self.surface.set_alpha(255-255*(pg.time.get_ticks()-self.begin_time)/self.duration)
+        self.surface.set_alpha(255-255*(game_clock.get_ticks()-self.begin_time)/self.duration)
 
 
 class Player(UserObject):
@@ -68,14 +70,14 @@ class Player(UserObject):
 
         self.mask = pg.mask.from_surface(self.surface)
 
-        self.dash_sound = pg.mixer.Sound("assets/sounds/SON_DASH.mp3")
+        self.dash_sound = assets.sound("assets/sounds/SON_DASH.mp3")
         self.dash_sound.set_volume(0.20)
 
-        self.jump_sound = pg.mixer.Sound("assets/sounds/SON_JUMP.mp3")
+        self.jump_sound = assets.sound("assets/sounds/SON_JUMP.mp3")
         self.jump_sound.set_volume(0.25)
 
-        self.pg_chad = pg.image.load("assets/sprites/PG_CHAD.png").convert()
-        self.pg_chad_alpha = pg.image.load("assets/sprites/PG_CHAD.png").convert_alpha()
+        self.pg_chad = assets.image("assets/sprites/PG_CHAD.png")
+        self.pg_chad_alpha = assets.image("assets/sprites/PG_CHAD.png", alpha=True)
         self.pg_chad_alpha = pg.transform.smoothscale(self.pg_chad_alpha, (50, 50))
         self.pg_chad = pg.transform.smoothscale(self.pg_chad, (50, 50))
         self.chad = False
@@ -111,18 +113,18 @@ class Player(UserObject):
 
         if self.jumping:
             self.vel.y = self.gravity #* self.vel_acc
-            self.gravity += self.d_gravity * 60 / self.app.clock.get_fps() * self.vel_acc
+            self.gravity += self.d_gravity * self.vel_acc
         if self.dashing:
-            if pg.time.get_ticks() - self.last_frame > self.delay_frames:
+            if game_clock.get_ticks() - self.last_frame > self.delay_frames:
                 self.app.game.add_object(Trail(self.rect.topleft, self.rect.size, self.surface.get_at((0, 0)),
                                                self.length_trail))
-                self.last_frame = pg.time.get_ticks()
+                self.last_frame = game_clock.get_ticks()
             self.vel += self.dash_vel * self.vel_acc
-            if pg.time.get_ticks() - self.dash_time > self.dash_duration:
+            if game_clock.get_ticks() - self.dash_time > self.dash_duration:
                 self.dashing = False
 
         if not self.dash_available:
-            if pg.time.get_ticks() - self.dash_time > self.dash_countdown:
+            if game_clock.get_ticks() - self.dash_time > self.dash_countdown:
                 self.dash_available = True
 
     def jump(self):
@@ -140,7 +142,7 @@ class Player(UserObject):
             self.dash_vel = self.directions[self.direction] * self.dash_base_vel
             self.dash_available = False
             self.dashing = True
-            self.dash_time = pg.time.get_ticks()
+            self.dash_time = game_clock.get_ticks()
 
     def move(self, direction: str):
         self.vel += self.directions[direction] * self.base_vel * (not self.dead) * self.vel_acc
@@ -0,0 +1,36 @@
+import pygame as pg
+from collections import OrderedDict
+
+
+class TextCache:
+
+    """
+    Texts already rendered, shared by every Text (and so the Titles and Buttons), the leaderboard and the loading screen.
+
+    render(font, text, color) gives the same surface as font.render(text, antialias, color), but only renders it the
+    first time : the surfaces are kept by (font, text, color, antialias), and the least recently used one is forgotten
+    when there are more than max_size of them. The surfaces are shared, they must be copied before being modified
+    (filled, set_alpha...).
+    """
+
+    def __init__(self, max_size: int = 512):
+        self.max_size = max_size
+        self.surfaces: OrderedDict[tuple, pg.Surface] = OrderedDict()
+
+    def render(self, font: pg.font.Font, text: str, color, antialias: bool = True) -> pg.Surface:
+        key = (font, text, tuple(pg.Color(color)), antialias)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            return surface
+
+        surface = self.surfaces[key] = font.render(text, antialias, color)
+        if len(self.surfaces) > self.max_size:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def clear(self):
+        self.surfaces.clear()
+
+
+text_cache = TextCache()
@@ -1,6 +1,10 @@
 import pygame as pg
 from . import vec
+from .text_cache import text_cache
+from .assets import assets
+from .clock import game_clock
 from copy import copy
+from math import ceil
 
 
 def s_scale(img: pg.Surface, k: float) -> pg.Surface:
@@ -50,6 +54,7 @@ class BlackLayer(UiObject):
 class Text(UiObject):
     """
     A text object that can be drawn on screen.
+    The texts are rendered through text_cache, and modify_content does nothing when the content doesn't change.
     """
 
     def __init__(self, pos: tuple[int, int], font: pg.font.Font, text: str, color: pg.Color, resize_=(0, 0), scale_=0,
@@ -58,7 +63,7 @@ class Text(UiObject):
         self.color = color
         self.text = text
 
-        rendered_text = font.render(text, True, color)
+        rendered_text = text_cache.render(font, text, color)
         super(Text, self).__init__(pos, rendered_text.get_size(), alpha=True)
         if centered:
             self.rect.center = pos
@@ -74,7 +79,8 @@ class Text(UiObject):
             self.rect = self.surface.get_rect(topleft=pos)
 
         if shadow_ is not None:
-            self.shadow_surf = font.render(text, True, (0, 0, 0))
+            # copied : Game.show_transparent_text changes its alpha
+            self.shadow_surf = text_cache.render(font, text, (0, 0, 0)).copy()
             self.shadow_rect = self.shadow_surf.get_rect(center=self.rect.center+pg.Vector2(shadow_))
             self.original_img_shadow = self.shadow_surf
 
@@ -90,14 +96,17 @@ class Text(UiObject):
             self.shadow_rect = self.shadow_surf.get_rect(center=self.shadow_rect.center)
 
     def modify_content(self, new_text: str):
+        if new_text == self.text:
+            return
         self.text = new_text
-        self.surface = self.font.render(new_text, True, self.color)
+        # copied like in __init__, the cached surfaces are shared
+        self.surface = text_cache.render(self.font, new_text, self.color).copy()
         if hasattr(self, "resize_"):
             self.surface = resize(self.surface, self.resize_)
         elif hasattr(self, "scale_"):
             self.surface = s_scale(self.surface, self.scale_)
         if hasattr(self, "shadow_surf"):
-            self.shadow_surf = self.font.render(new_text, True, (0, 0, 0))
+            self.shadow_surf = text_cache.render(self.font, new_text, (0, 0, 0)).copy()
             self.shadow_rect = self.rect.move(self.shadow_rect.x - self.rect.x, self.shadow_rect.y - self.rect.y)
         self.rect = self.surface.get_rect(topleft=self.rect.topleft)
         self.original_img = self.surface
@@ -110,7 +119,14 @@ class Text(UiObject):
 
 class Title(Text):
 
+    """
+    A text that grows to big_scale (start_scaling) and shrinks back (start_descaling) in scaling_delay ms.
+    The scaled texts are made once, one for each frame of the animation at ANIMATION_FPS, and the animation shows the
+    nearest one.
+    """
+
     IN_BACKGROUND = True
+    ANIMATION_FPS = 60
 
     def __init__(self, pos: tuple[int, int], font: pg.font.Font, text: str, color: pg.Color, big_scale: float = 2,
                  scaling_delay: int = 500, resize_=(0, 0), scale_=0, shadow_=None):
@@ -122,6 +138,34 @@ class Title(Text):
         self.scaled = False
         self.phase_begin_time = 0
         self.current_scale = 1
+        self.frames = self.make_frames()
+
+    def make_frames(self) -> list[tuple[pg.Surface, pg.Surface | None]]:
+        # (text, shadow) scaled from 1 to big_scale
+        n_frames = max(2, ceil(self.scaling_delay * self.ANIMATION_FPS / 1000) + 1)
+        shadow = getattr(self, "original_img_shadow", None)
+        frames = [(self.original_img, shadow)]
+        for i in range(1, n_frames):
+            k = 1 + (self.big_scale - 1) * i / (n_frames - 1)
+            frames.append((s_scale(self.original_img, k), s_scale(shadow, k) if shadow is not None else None))
+        return frames
+
+    def scale(self, n: float):
+        self.current_scale = n
+        index = round((n - 1) / (self.big_scale - 1) * (len(self.frames) - 1)) if self.big_scale != 1 else 0
+        self.surface, shadow = self.frames[min(max(index, 0), len(self.frames) - 1)]
+        self.rect = self.surface.get_rect(center=self.rect.center)
+        if shadow is not None:
+            self.shadow_surf = shadow
+            self.shadow_rect = self.shadow_surf.get_rect(center=self.shadow_rect.center)
+
+    def modify_content(self, new_text: str):
+        if new_text == self.text:
+            return
+        super(Title, self).modify_content(new_text)
+        if hasattr(self, "shadow_surf"):
+            self.original_img_shadow = self.shadow_surf
+        self.frames = self.make_frames()
 
     def start_scaling(self):
         if not self.scaling and not self.descaling:
@@ -144,14 +188,14 @@ class Title(Text):
         if self.scaling:
             if pg.time.get_ticks() - self.phase_begin_time > self.scaling_delay:
                 self.scaling = False
-                self.current_scale = self.big_scale
+                self.scale(self.big_scale)
             else:
                 self.current_scale = 1 + (self.big_scale - 1) * advance / self.scaling_delay
                 self.scale(self.current_scale)
         elif self.descaling:
             if pg.time.get_ticks() - self.phase_begin_time > self.scaling_delay:
                 self.descaling = False
-                self.current_scale = 1
+                self.scale(1)
             else:
                 self.current_scale = self.big_scale - (self.big_scale - 1) * advance / self.scaling_delay
                 self.scale(self.current_scale)
@@ -221,9 +265,12 @@ class Button(UiObject):
         self.off = off
 
         self.press_time = 0
+        # time of the press on the game clock : whether a click counts must not depend on the real time, or a replay
+        # (faster than the recording) could drop it
+        self.press_game_time = 0
         self.press_delay = 25
 
-        self.click_sound = pg.mixer.Sound("assets/sounds/SON_BOUTON.mp3")
+        self.click_sound = assets.sound("assets/sounds/SON_BOUTON.mp3")
         self.play_sound = True
 
     def handle_events(self, event: pg.event.Event):
@@ -232,9 +279,10 @@ class Button(UiObject):
                 self.exec_func("down", "click")
                 self.state = "click"
                 self.press_time = pg.time.get_ticks()
+                self.press_game_time = game_clock.get_ticks()
                 if self.play_sound:
                     self.click_sound.play()
-        elif event.type == pg.MOUSEBUTTONUP and (pg.time.get_ticks() - self.press_time > self.press_delay):
+        elif event.type == pg.MOUSEBUTTONUP and (game_clock.get_ticks() - self.press_game_time > self.press_delay):
             if event.button == self.button and self.rect.collidepoint(event.pos):
                 self.exec_func("up", "click")
             self.state = "hover" if self.rect.collidepoint(event.pos) else "normal"
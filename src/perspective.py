@@ -0,0 +1,105 @@
+"""
+Geometry of the perspective faces drawn by Game.draw_perspective, computed for all the visible objects at once.
+
+The operations are the ones the drawing used to do with pg.Vector2 (in the same order, with the same 64 bits floats),
+so the polygons are exactly the same, only the submission of the polygons is left to the drawing loop.
+"""
+
+import numpy as np
+from .objects import Object2d, vec
+
+Point = tuple[float, float]
+Polygon = tuple[Point, Point, Point, Point]
+
+
+def get_length3d(objects: list[Object2d]) -> np.ndarray:
+    return np.array([obj.length3d if hasattr(obj, "length3d") else 10 for obj in objects], dtype=float)
+
+
+def to_polygons(*points: tuple[np.ndarray, np.ndarray]) -> list[Polygon]:
+    # arrays of the x and y coordinates of each corner -> list of polygons, one per object
+    corners = [list(zip(x.tolist(), y.tolist())) for x, y in points]
+    return list(zip(*corners))
+
+
+def get_box_faces(objects: list[Object2d], scroll: vec, vanishing_point: vec) -> \
+        list[tuple[tuple[str, bool, Polygon], tuple[str, bool, Polygon]]]:
+    """
+    The two faces of each object (a vertical one then an horizontal one) that can be on the side of the vanishing
+    point : (direction of the face, True if the face is on the side of the vanishing point, polygon of the face).
+    """
+    if not objects:
+        return []
+    x, y, w, h = np.array([tuple(obj.rect) for obj in objects], dtype=float).T
+    length3d = get_length3d(objects)
+
+    pos_x, pos_y = x + scroll.x, y + scroll.y
+    vector_x, vector_y = vanishing_point.x - pos_x, vanishing_point.y - pos_y
+    right, bottom = vector_x > w / 2, vector_y > h / 2
+
+    # the faces start from the corner of the rect that is the closest to the vanishing point
+    vector_x, vector_y = vector_x - w * right, vector_y - h * bottom
+    pos_x, pos_y = pos_x + w * right, pos_y + h * bottom
+    far_x, far_y = pos_x + vector_x / length3d, pos_y + vector_y / length3d
+
+    # the vertical face (top or bottom) goes along the horizontal edge
+    edge_x = pos_x + np.where(right, -w, w)
+    vertical_faces = to_polygons((pos_x, pos_y), (edge_x, pos_y),
+                                 (edge_x + np.where(right, vector_x + w, vector_x - w) / length3d,
+                                  pos_y + vector_y / length3d),
+                                 (far_x, far_y))
+    vertical_seen = np.where(bottom, vector_y / length3d > 0, vector_y / length3d < 0).tolist()
+
+    # the horizontal face (left or right) goes along the vertical edge
+    edge_y = pos_y + np.where(bottom, -h, h)
+    horizontal_faces = to_polygons((pos_x, pos_y), (pos_x, edge_y),
+                                   (pos_x + vector_x / length3d,
+                                    edge_y + np.where(bottom, vector_y + h, vector_y - h) / length3d),
+                                   (far_x, far_y))
+    horizontal_seen = np.where(right, vector_x / length3d > 0, vector_x / length3d < 0).tolist()
+
+    return [(("bottom" if is_bottom else "top", v_seen, v_face), ("right" if is_right else "left", h_seen, h_face))
+            for is_bottom, v_seen, v_face, is_right, h_seen, h_face in
+            zip(bottom.tolist(), vertical_seen, vertical_faces, right.tolist(), horizontal_seen, horizontal_faces)]
+
+
+def get_spike_faces(objects: list[Object2d], scroll: vec, vanishing_point: vec) -> \
+        list[tuple[Polygon, Polygon, Polygon, bool, bool, bool, int]]:
+    """
+    The faces of each spike : (right face, left face, bottom face, True if only the right face is seen, True if only
+    the left face is seen, True if the bottom face can be the only one seen, index of the corner the closest to the
+    vanishing point (0 : left, 1 : right, 2 : top)).
+    """
+    if not objects:
+        return []
+    x, y = np.array([obj.rect.topleft for obj in objects], dtype=float).T
+    width, height = np.array([obj.surface.get_size() for obj in objects], dtype=float).T
+    length3d = get_length3d(objects)
+
+    left_x, left_y = x + 0 + scroll.x, y + height + scroll.y
+    right_x, right_y = x + width + scroll.x, y + height + scroll.y
+    top_x, top_y = x + width / 2 + scroll.x, y + height * 0.13 + scroll.y
+
+    vector_left = (vanishing_point.x - left_x) / length3d, (vanishing_point.y - left_y) / length3d
+    vector_right = (vanishing_point.x - right_x) / length3d, (vanishing_point.y - right_y) / length3d
+    vector_top = (vanishing_point.x - top_x) / length3d, (vanishing_point.y - top_y) / length3d
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope_left = vector_left[1] / vector_left[0]
+        slope_right = vector_right[1] / vector_right[0]
+        slope_top = vector_top[1] / vector_top[0]
+    only_right = (vector_left[0] > 0) & (0 > vector_left[1]) & (-1.7 < slope_left) & (slope_left < 0)
+    only_left = (vector_right[0] < 0) & (0 < slope_right) & (slope_right < 1.7) & (vector_left[1] < 0)
+    only_bottom = (vector_top[1] > 0) & np.where(vector_top[0] > 0, slope_top > 1.7, slope_top < -1.7)
+    nearest = np.argmin([vector[0] ** 2 + vector[1] ** 2 for vector in (vector_left, vector_right, vector_top)],
+                        axis=0)
+
+    right_faces = to_polygons((right_x, right_y), (right_x + vector_right[0], right_y + vector_right[1]),
+                              (top_x + vector_top[0], top_y + vector_top[1]), (top_x, top_y))
+    left_faces = to_polygons((left_x, left_y), (left_x + vector_left[0], left_y + vector_left[1]),
+                             (top_x + vector_top[0], top_y + vector_top[1]), (top_x, top_y))
+    bottom_faces = to_polygons((left_x, left_y), (left_x + vector_left[0], left_y + vector_left[1]),
+                               (right_x + vector_right[0], right_y + vector_right[1]), (right_x, right_y))
+
+    return list(zip(right_faces, left_faces, bottom_faces, only_right.tolist(), only_left.tolist(),
+                    only_bottom.tolist(), nearest.tolist()))
@@ -0,0 +1,150 @@
+import csv
+import json
+import pygame as pg
+from collections import deque
+from time import perf_counter
+from .objects import assets
+
+
+class PhaseTimer:
+
+    # adds the time spent in the with block to its phase of the current frame
+    __slots__ = ("times", "name", "begin")
+
+    def __init__(self, times: dict[str, float], name: str):
+        self.times = times
+        self.name = name
+        self.begin = 0.0
+
+    def __enter__(self):
+        self.begin = perf_counter()
+
+    def __exit__(self, *exc_info):
+        self.times[self.name] += perf_counter() - self.begin
+
+
+class FrameProfiler:
+
+    """
+    Time spent in each phase of the frames, and counters of the work done in them.
+
+    The phases are timed by putting the code in a `with profiler.phase("update"):` block, and the counters are
+    increased with profiler.count("polygons"). App.run closes each frame with end_frame, which keeps the last frames
+    for the HUD (toggled with F3) and writes the frame in the export file if there is one
+    (python main.py profile=frames.csv, or profile=frames.jsonl for one JSON object per line).
+    A frame runs any number of steps of the simulation (their phases and counters add up), and a phase can be part of
+    another one (the collisions are timed inside the update of the objects).
+    """
+
+    PHASES = ("transition", "scroll", "chunks", "update", "collisions", "removal",
+              "background", "perspective", "draw", "ui", "display")
+    COUNTERS = ("steps", "objects_updated", "colliders_scanned", "polygons", "blits", "chunks_generated")
+
+    HUD_KEY = pg.K_F3
+    # the HUD text is only rendered again every HUD_REFRESH frames (rendering it costs more than the rest)
+    HUD_REFRESH = 15
+
+    def __init__(self, history: int = 120):
+        self.times = dict.fromkeys(self.PHASES, 0.0)
+        self.counters = dict.fromkeys(self.COUNTERS, 0)
+        self.timers = {name: PhaseTimer(self.times, name) for name in self.PHASES}
+        # last frames : {"frame": index, "frame_ms": time since the previous frame, "<phase>_ms": ..., "<counter>": ...}
+        self.frames: deque[dict[str, float | int]] = deque(maxlen=history)
+        self.n_frames = 0
+        self.last_end = perf_counter()
+
+        self.show_hud = False
+        self.hud: pg.Surface | None = None
+        self.font: pg.font.Font | None = None
+
+        self.export_file = None
+        self.csv_writer: csv.DictWriter | None = None
+
+    def reset(self):
+        # forgets what has been measured so far (e.g. the loading), the next frame starts now
+        for name in self.times:
+            self.times[name] = 0.0
+        for name in self.counters:
+            self.counters[name] = 0
+        self.frames.clear()
+        self.last_end = perf_counter()
+
+    def phase(self, name: str) -> PhaseTimer:
+        return self.timers[name]
+
+    def count(self, name: str, n: int = 1):
+        self.counters[name] += n
+
+    def get_fields(self) -> list[str]:
+        return ["frame", "frame_ms"] + [f"{name}_ms" for name in self.PHASES] + list(self.COUNTERS)
+
+    def end_frame(self):
+        now = perf_counter()
+        frame = {"frame": self.n_frames, "frame_ms": round((now - self.last_end) * 1000, 4)}
+        for name, time in self.times.items():
+            frame[f"{name}_ms"] = round(time * 1000, 4)
+            self.times[name] = 0.0
+        for name, n in self.counters.items():
+            frame[name] = n
+            self.counters[name] = 0
+        self.frames.append(frame)
+        self.n_frames += 1
+        self.last_end = now
+
+        if self.csv_writer is not None:
+            self.csv_writer.writerow(frame)
+        elif self.export_file is not None:
+            self.export_file.write(json.dumps(frame) + "\n")
+
+    def get_means(self) -> dict[str, float]:
+        # mean of each field over the last frames
+        if not self.frames:
+            return {}
+        return {field: sum(frame[field] for frame in self.frames) / len(self.frames)
+                for field in self.get_fields()[1:]}
+
+    def start_export(self, path: str):
+        # .jsonl -> one JSON object per frame, anything else -> CSV
+        self.stop_export()
+        self.export_file = open(path, "w", newline="")
+        if not path.endswith(".jsonl"):
+            self.csv_writer = csv.DictWriter(self.export_file, fieldnames=self.get_fields())
+            self.csv_writer.writeheader()
+
+    def stop_export(self):
+        if self.export_file is not None:
+            self.export_file.close()
+        self.export_file = None
+        self.csv_writer = None
+
+    def handle_events(self, event: pg.event.Event):
+        if event.type == pg.KEYDOWN and event.key == self.HUD_KEY:
+            self.show_hud = not self.show_hud
+            self.hud = None
+
+    def render_hud(self) -> pg.Surface:
+        if self.font is None:
+            self.font = assets.font("assets/fonts/Consolas.ttf", 14)
+        means = self.get_means()
+        fps = 1000 / means["frame_ms"] if means.get("frame_ms") else 0
+        lines = [f"{fps:6.1f} FPS  {means.get('frame_ms', 0):6.2f} ms"]
+        lines += [f"{name:<12}{means.get(f'{name}_ms', 0):7.3f} ms" for name in self.PHASES]
+        lines += [f"{name:<18}{means.get(name, 0):7.1f}" for name in self.COUNTERS]
+
+        rendered = [self.font.render(line, True, (255, 255, 255)) for line in lines]
+        line_h = self.font.get_linesize()
+        hud = pg.Surface((max(surface.get_width() for surface in rendered) + 10, line_h * len(lines) + 10), pg.SRCALPHA)
+        hud.fill((0, 0, 0, 170))
+        for i, surface in enumerate(rendered):
+            hud.blit(surface, (5, 5 + i * line_h))
+        return hud
+
+    def draw(self, screen: pg.Surface):
+        if not self.show_hud:
+            return
+        if self.hud is None or self.n_frames % self.HUD_REFRESH == 0:
+            self.hud = self.render_hud()
+        screen.blit(self.hud, (screen.get_width() - self.hud.get_width() - 10, 10))
+
+
+profiler = FrameProfiler()
@@ -0,0 +1,91 @@
+from itertools import count
+from .objects import Object2d, StaticObject, DynamicObject, Monster
+
+# the ids are never given twice, so an object keeps its id for its whole life (even through Game.reset_object_lists)
+object_ids = count()
+
+
+class ObjectRegistry:
+
+    """
+    Registry of every object of the game, with the views the game needs on them.
+
+    Each object gets a stable id (Object2d.object_id) when it is added for the first time. The views are dicts used as
+    ordered sets : adding or removing an object is O(1) in every view, and each view keeps the order in which the
+    objects have been added (the collision algorithm and the drawing rely on it).
+    Iterating over the registry works like iterating over the list it replaces : the objects added during the
+    iteration (bullets, trails...) are iterated as well, in the same pass.
+    """
+
+    def __init__(self):
+        self.by_id: dict[int, Object2d] = {}
+        self.colliders: dict[StaticObject, None] = {}
+        self.monsters: dict[Monster, None] = {}
+        self.absolute_draw: dict[Object2d, None] = {}
+        self.chunks: dict[tuple[int, int] | str, dict[Object2d, None]] = {}
+        self.chunk_of: dict[Object2d, tuple[int, int] | str] = {}
+        # ids in the order they have been added, the removed ones stay in there until the next compaction
+        self.order: list[int] = []
+        self.n_iterating = 0
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def __contains__(self, obj: Object2d):
+        return obj.object_id is not None and self.by_id.get(obj.object_id) is obj
+
+    def __iter__(self):
+        self.n_iterating += 1
+        try:
+            i = 0
+            while i < len(self.order):
+                obj = self.by_id.get(self.order[i])
+                i += 1
+                if obj is not None:
+                    yield obj
+        finally:
+            self.n_iterating -= 1
+
+    def get(self, object_id: int) -> Object2d | None:
+        return self.by_id.get(object_id)
+
+    def add(self, obj: Object2d, chunk: tuple[int, int] | str | None = None):
+        if obj in self:
+            return
+        if obj.object_id is None:
+            obj.object_id = next(object_ids)
+        self.by_id[obj.object_id] = obj
+        self.order.append(obj.object_id)
+        if isinstance(obj, StaticObject) and not isinstance(obj, DynamicObject):
+            self.colliders[obj] = None
+        elif isinstance(obj, Monster):
+            self.monsters[obj] = None
+        if obj.ABSOLUTE_DRAW:
+            self.absolute_draw[obj] = None
+        if chunk is not None:
+            self.chunks.setdefault(chunk, {})[obj] = None
+            self.chunk_of[obj] = chunk
+
+    def remove(self, obj: Object2d) -> tuple[int, int] | str | None:
+        # returns the chunk the object belonged to (None if it was added outside of a chunk)
+        if obj not in self:
+            return None
+        del self.by_id[obj.object_id]
+        self.colliders.pop(obj, None)
+        self.monsters.pop(obj, None)
+        self.absolute_draw.pop(obj, None)
+        chunk = self.chunk_of.pop(obj, None)
+        if chunk is not None:
+            del self.chunks[chunk][obj]
+        # the order list can't be compacted while it is iterated over (the iterators keep an index in it)
+        if len(self.order) > 2 * len(self.by_id) + 64 and not self.n_iterating:
+            self.order = [id_ for id_ in self.order if id_ in self.by_id]
+        return chunk
+
+    def remove_chunk(self, chunk: tuple[int, int] | str) -> list[Object2d]:
+        # removes every object of the chunk, returns them
+        removed = list(self.chunks.get(chunk, {}))
+        for obj in removed:
+            self.remove(obj)
+        self.chunks.pop(chunk, None)
+        return removed
@@ -0,0 +1,150 @@
+"""
+Recording of the input of a play session, and its replay.
+
+python main.py record=session.rec          plays normally, and records the session in session.rec
+python main.py replay session.rec [headless] [norender] [profile=frames.csv]
+
+The simulation only depends on the seed of the session (the random module and the presets of the map), on the keys
+read by the binds at each step, on the events given to Game.handle_events, and on game_clock (which only moves with the
+steps). So that is what is recorded, with the number of steps of each frame (and where the frame has been drawn in
+between two steps) : the replay runs the same steps and draws the same frames, without waiting in headless mode.
+The UI (buttons, titles...) still runs on the real time, and the settings and leaderboard menus are not opened again
+during a replay (the changes of the keys made in the settings are recorded).
+"""
+
+import gzip
+import json
+import pygame as pg
+from .objects import key_state
+from .profiler import profiler
+
+FORMAT_VERSION = 1
+
+# type of event -> attributes kept
+RECORDED_EVENTS = {
+    pg.KEYDOWN: ("key", "mod", "unicode", "scancode"),
+    pg.KEYUP: ("key", "mod", "unicode", "scancode"),
+    pg.MOUSEBUTTONDOWN: ("button", "pos"),
+    pg.MOUSEBUTTONUP: ("button", "pos")
+}
+
+
+def get_settings(app) -> dict:
+    return {"key_preset": app.key_preset, "keys": dict(app.game.player.KEYS)}
+
+
+def apply_settings(app, settings: dict):
+    app.key_preset = settings["key_preset"]
+    app.game.player.KEYS.update(settings["keys"])
+    app.game.player.do_binding()
+
+
+def load_recording(path: str) -> dict:
+    with gzip.open(path, "rt") as file:
+        recording = json.load(file)
+    if recording.get("version") != FORMAT_VERSION:
+        raise ValueError(f"{path} : unknown recording format {recording.get('version')}")
+    return recording
+
+
+class InputRecorder:
+
+    """
+    Input of a play session, saved to be replayed (see Replayer).
+
+    App.run gives it the events the game handles (record_event), calls record_step before each step of the simulation
+    and record_frame after each frame. The keys pressed and the settings are only stored when they change, and the
+    whole recording is saved as gzipped JSON when the session ends.
+    """
+
+    def __init__(self, path: str, seed: int, tick_rate: int):
+        self.path = path
+        self.seed = seed
+        # frames : [number of steps, alpha of the drawing], events : [frame, type, attributes],
+        # keys : [step, keys pressed], settings : [step, settings]
+        self.recording = {"version": FORMAT_VERSION, "seed": seed, "tick_rate": tick_rate,
+                          "frames": [], "events": [], "keys": [], "settings": []}
+        self.n_steps = 0
+        self.last_keys = None
+        self.last_settings = None
+
+    def record_event(self, event: pg.event.Event):
+        if event.type in RECORDED_EVENTS:
+            attributes = {name: getattr(event, name) for name in RECORDED_EVENTS[event.type] if hasattr(event, name)}
+            self.recording["events"].append([len(self.recording["frames"]), event.type, attributes])
+
+    def record_step(self, app):
+        # the keys the binds are going to read during the step
+        pressed = pg.key.get_pressed()
+        keys = sorted(key for key in app.game.player.get_bound_keys() if pressed[key])
+        if keys != self.last_keys:
+            self.recording["keys"].append([self.n_steps, keys])
+            self.last_keys = keys
+        if (settings := get_settings(app)) != self.last_settings:
+            self.recording["settings"].append([self.n_steps, settings])
+            self.last_settings = settings
+        self.n_steps += 1
+
+    def record_frame(self, n_steps: int, alpha: float):
+        self.recording["frames"].append([n_steps, round(alpha, 4)])
+
+    def save(self):
+        with gzip.open(self.path, "wt") as file:
+            json.dump(self.recording, file, separators=(",", ":"))
+
+
+class Replayer:
+
+    """
+    Plays a recorded session again, from a game loaded with the seed of the recording (see App.replay).
+
+    The keys of each step are given to the binds through key_state, the events are given to Game.handle_events at the
+    beginning of their frame. With render, each frame is drawn where it had been drawn during the session.
+    """
+
+    def __init__(self, app, recording: dict):
+        self.app = app
+        self.recording = recording
+        self.events: dict[int, list[pg.event.Event]] = {}
+        for frame, event_type, attributes in recording["events"]:
+            if "pos" in attributes:
+                attributes["pos"] = tuple(attributes["pos"])
+            self.events.setdefault(frame, []).append(pg.event.Event(event_type, attributes))
+        self.keys = {step: keys for step, keys in recording["keys"]}
+        self.settings = {step: settings for step, settings in recording["settings"]}
+
+    def apply_first_settings(self):
+        if self.recording["settings"]:
+            apply_settings(self.app, self.recording["settings"][0][1])
+
+    def run(self, render: bool = True):
+        game = self.app.game
+        step = 0
+        profiler.reset()
+        try:
+            for frame, (n_steps, alpha) in enumerate(self.recording["frames"]):
+                if not self.app.headless:
+                    for event in pg.event.get():
+                        if event.type == pg.QUIT:
+                            return
+                        profiler.handle_events(event)
+                for event in self.events.get(frame, ()):
+                    game.handle_events(event)
+
+                for _ in range(n_steps):
+                    if step in self.settings:
+                        apply_settings(self.app, self.settings[step])
+                    if step in self.keys:
+                        key_state.set_pressed(self.keys[step])
+                    game.step()
+                    step += 1
+
+                if render:
+                    game.render(alpha)
+                    if not self.app.headless:
+                        profiler.draw(self.app.screen)
+                        pg.display.update()
+                        self.app.clock.tick(self.app.FPS)
+                profiler.end_frame()
+        finally:
+            key_state.set_pressed(None)
@@ -1,6 +1,6 @@
 import pygame as pg
 
-from .objects import Button, Text, vec
+from .objects import Button, Text, vec, assets
 
 
 def switch_on_off(button: Button, settings_instance):
@@ -52,9 +52,9 @@ class SettingsMenu:
         self.on_zqsd = self.app.key_preset == "ZQSD"
         self.on_arrows = self.app.key_preset == "Arrow Keys"
 
-        title_font = pg.font.Font("assets/fonts/DISTROB_.ttf", 55)
-        subtitles_font = pg.font.Font("assets/fonts/DISTRO__.ttf", 35)
-        sub_subtitles_font = pg.font.Font("assets/fonts/DISTRO__.ttf", 20)
+        title_font = assets.font("assets/fonts/DISTROB_.ttf", 55)
+        subtitles_font = assets.font("assets/fonts/DISTRO__.ttf", 35)
+        sub_subtitles_font = assets.font("assets/fonts/DISTRO__.ttf", 20)
         self.ui_objects = [
             Text((self.w // 2, self.h / 10), title_font, "Settings", pg.Color(255, 255, 255), shadow_=(2, 2),
                  centered=True),
@@ -117,7 +117,7 @@ class SettingsMenu:
         self.app.play_sound = self.ui_objects[4].on
         self.app.play_music = self.ui_objects[5].on
         if not self.app.play_music:
-            pg.mixer.music.unload()
+            self.app.game.music.stop()
 
     def get_selected_preset(self):
         buttons = self.ui_objects[2:4]
@@ -154,11 +154,12 @@ class SettingsMenu:
             self.app.play_music = self.ui_objects[5].on
 
             if not self.app.play_music:
-                pg.mixer.music.unload()
-            elif not pg.mixer.music.get_busy():
-                pg.mixer.music.load('assets/music/' + self.app.game.musics[0])
-                pg.mixer.music.play()
+                self.app.game.music.stop()
+            elif not self.app.game.music.get_busy():
+                self.app.game.music.play(self.app.game.musics[0])
+                self.app.game.music.prefetch(self.app.game.musics[1])
                 self.app.game.music_index = 1
+            self.app.game.music.update()
 
             for ui_object in self.ui_objects:
                 if hasattr(ui_object, "update"):